@@ -1,36 +1,199 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
+import aiohttp
 import asyncio
 import logging
-from datetime import datetime
-from config import DISCORD_TOKEN, BOT_PREFIX, REMINDER_CHECK_INTERVAL, MAX_CONCURRENT_REMINDERS
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+try:
+    import uvloop  # Faster event loop; not available on Windows
+except ImportError:
+    uvloop = None
+from config import CFG
 
 # Set up logging
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=CFG.log_level,
+    format=CFG.log_format
 )
 logger = logging.getLogger(__name__)
 
+def _build_welcome_embed() -> discord.Embed:
+    """Build the static welcome embed sent when joining a server"""
+    embed = discord.Embed(
+        title="🤖 Dawg wit da butta on his head",
+        description="Thanks for adding me to your server! I'm here to help you manage your to-do lists with deadlines and custom reminders.",
+        color=discord.Color.green()
+    )
+    
+    # Add command list
+    embed.add_field(
+        name="📋 Available Commands",
+        value=(
+            "**To-Do Commands:**\n"
+            "• `!add <task>` - Add a new task\n"
+            "• `!add <task> | <deadline>` - Add task with deadline\n"
+            "• `!list` - Show your to-do list\n"
+            "• `!deadline <id> <deadline>` - Set deadline for a task\n"
+            "• `!complete <id>` - Mark task as completed\n"
+            "• `!uncomplete <id>` - Mark task as uncompleted\n"
+            "• `!remove <id>` - Remove a task\n"
+            "• `!clear` - Remove all completed tasks\n"
+            "• `!clearall` - Remove all tasks\n\n"
+            "**Reminder Commands:**\n"
+            "• `!remindme <message> | <time>` - Set a custom reminder\n"
+            "• `!reminders` - Show your active reminders\n"
+            "• `!delreminder <id>` - Delete a specific reminder\n"
+            "• `!clearreminders` - Delete all your reminders\n\n"
+            "• `!help` - Show this help message"
+        ),
+        inline=False
+    )
+    
+    embed.add_field(
+        name="⏰ Time Formats",
+        value=(
+            "**Deadlines:** `in 2 hours`, `2024-12-31 17:00`\n"
+            "**Reminders:** `in 30 minutes`, `14:30`, `2024-12-31`\n"
+            "**Both support:** relative time, specific dates/times"
+        ),
+        inline=True
+    )
+    
+    embed.add_field(
+        name="🔒 Privacy & Security",
+        value=(
+            "• **Encrypted storage** - All data is encrypted\n"
+            "• **User isolation** - Each user has private tasks\n"
+            "• **Data hashing** - User IDs and content are hashed\n"
+            "• **Private reminders** - Reminders sent via DM only"
+        ),
+        inline=True
+    )
+    
+    embed.set_footer(text="Use !help for detailed command information")
+    
+    return embed
+
+def _build_dm_help_embed() -> discord.Embed:
+    """Build the static help embed sent in reply to non-command DMs"""
+    embed = discord.Embed(
+        title="🤖 To-Do Bot Help",
+        description="Welcome! I'm your personal to-do list manager. Here are the available commands:",
+        color=discord.Color.blue()
+    )
+    
+    embed.add_field(
+        name="📋 To-Do Commands",
+        value=(
+            "• `!add <task>` - Add a new task\n"
+            "• `!add <task> | <deadline>` - Add task with deadline\n"
+            "• `!list` - Show your to-do list\n"
+            "• `!deadline <id> <deadline>` - Set deadline for a task\n"
+            "• `!complete <id>` - Mark task as completed\n"
+            "• `!uncomplete <id>` - Mark task as uncompleted\n"
+            "• `!remove <id>` - Remove a task\n"
+            "• `!clear` - Remove all completed tasks\n"
+            "• `!clearall` - Remove all tasks"
+        ),
+        inline=True
+    )
+    
+    embed.add_field(
+        name="⏰ Reminder Commands",
+        value=(
+            "• `!remindme <message> | <time>` - Set a custom reminder\n"
+            "• `!reminders` - Show your active reminders\n"
+            "• `!delreminder <id>` - Delete a specific reminder\n"
+            "• `!clearreminders` - Delete all your reminders"
+        ),
+        inline=True
+    )
+    
+    embed.add_field(
+        name="⏰ Time Examples",
+        value=(
+            "• `!add Buy groceries | in 2 hours`\n"
+            "• `!remindme Take medicine | in 30 minutes`\n"
+            "• `!add Submit report | 2024-12-31 17:00`\n"
+            "• `!remindme Call dentist | 14:30`"
+        ),
+        inline=True
+    )
+    
+    embed.add_field(
+        name="🔒 Privacy Features",
+        value=(
+            "• **Private to-do lists** - Only you can see your tasks\n"
+            "• **Encrypted storage** - All data is encrypted\n"
+            "• **Data hashing** - User IDs and content are hashed\n"
+            "• **Private reminders** - Reminders sent to you only"
+        ),
+        inline=True
+    )
+    
+    embed.set_footer(text="Your data is encrypted and private - only you can see your tasks and reminders!")
+    
+    return embed
+
+# Static embeds are built once; handlers only clone them and stamp the time
+_WELCOME_EMBED_DICT = _build_welcome_embed().to_dict()
+_DM_HELP_EMBED_DICT = _build_dm_help_embed().to_dict()
+
+# Length of the command prefix, for a cheap slice compare in on_message
+_PREFIX_LEN = len(CFG.bot_prefix)
+
+# Bot status, shared by every session
+_ACTIVITY = discord.Activity(
+    type=discord.ActivityType.watching,
+    name="your to-do lists | !help"
+)
+
+# Command error -> reply text (callables build the text from the error)
+_ERROR_REPLIES = {
+    commands.CommandNotFound: "❌ Command not found! Use `!help` to see available commands.",
+    commands.MissingRequiredArgument: lambda error: f"❌ Missing required argument: {error.param}",
+    commands.BadArgument: "❌ Invalid argument provided. Please check your input.",
+}
+
 class TodoBot(commands.Bot):
     def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.guilds = True
+        # Only subscribe to the gateway events the bot actually handles
+        intents = discord.Intents.none()
+        intents.guilds = True  # Guild join/channel data for welcome messages
+        intents.guild_messages = True  # Commands in servers
         intents.dm_messages = True  # Enable DM support
+        intents.message_content = True  # Read command text
         
         super().__init__(
-            command_prefix=BOT_PREFIX,
+            command_prefix=CFG.bot_prefix,
             intents=intents,
-            help_command=None  # We'll create our own help command
+            help_command=None,  # We'll create our own help command
+            activity=_ACTIVITY,  # Sent with IDENTIFY, so reconnects need no change_presence call
+            max_messages=None,  # No message cache - commands are handled as they arrive
+            # Reminder DMs arrive in bursts: keep connections and DNS warm between them
+            # (limit=0 matches discord.py's default unbounded pool; its rate limiter paces requests)
+            connector=aiohttp.TCPConnector(limit=0, ttl_dns_cache=300, keepalive_timeout=60)
         )
         
         # Performance optimizations
         self._last_reminder_check = datetime.now()
-        self._reminder_cache = set()  # Cache sent reminders to avoid duplicates
+        self._reminder_cache = set()  # Keys of reminders queued or being sent, to avoid duplicate DMs
+        self._user_cache = {}  # user ID -> (User, fetched at) to skip repeated fetch_user calls
+        self._user_fetches = {}  # user ID -> in-flight fetch_user task shared by concurrent sends
+        self._next_dm_at = {}  # user ID -> earliest loop time the next reminder DM may go out
+        self._dm_help_sent = {}  # user ID -> when we last replied to a non-command DM, oldest first
+        self._self_id = None  # Our own user ID, set once logged in
+        self._todo_cog = None  # TodoCommands cog, cached once loaded
+        self._send_queue = asyncio.Queue()  # (send coroutine function, args) drained by a fixed worker pool
+        self._send_workers = []
         
-        # Start the reminder checker task
-        self.reminder_checker.start()
+        # Event-driven reminder scheduling: one background loop sleeps until the next due item
+        self._reminder_wakeup = asyncio.Event()  # Set when something may now be due earlier
+        self._next_reminder_at: Optional[datetime] = None
+        self._reminder_task: Optional[asyncio.Task] = None
     
     async def setup_hook(self):
         """Called when the bot is starting up"""
@@ -39,206 +202,167 @@ class TodoBot(commands.Bot):
         # Load the todo commands cog
         try:
             await self.load_extension('todo_commands')
+            self._todo_cog = self.get_cog('TodoCommands')
             logger.info("✅ Successfully loaded todo_commands cog")
         except Exception as e:
-            logger.error(f"❌ Failed to load todo_commands cog: {e}")
+            logger.error("❌ Failed to load todo_commands cog: %s", e)
+        
+        # A fixed pool of workers bounds how many reminder DMs are in flight
+        self._send_workers = [
+            asyncio.create_task(self._send_worker()) for _ in range(CFG.max_concurrent_reminders)
+        ]
+        
+        # Start the reminder loop; it primes itself from the database
+        self._reminder_task = asyncio.create_task(self._reminder_loop())
         
         logger.info("Bot setup complete!")
     
     async def on_ready(self):
         """Called when the bot is ready"""
-        logger.info(f"✅ Bot is ready! Logged in as {self.user}")
-        logger.info(f"Bot ID: {self.user.id}")
-        logger.info(f"Connected to {len(self.guilds)} guild(s)")
-        
-        # Set bot status
-        activity = discord.Activity(
-            type=discord.ActivityType.watching,
-            name="your to-do lists | !help"
-        )
-        await self.change_presence(activity=activity)
+        logger.info("✅ Bot is ready! Logged in as %s", self.user)
+        logger.info("Bot ID: %s", self.user.id)
+        self._self_id = self.user.id
+        logger.info("Connected to %s guild(s)", len(self.guilds))
     
     async def on_guild_join(self, guild):
         """Called when the bot joins a new server"""
-        logger.info(f"🎉 Joined new server: {guild.name} (ID: {guild.id})")
+        logger.info("🎉 Joined new server: %s (ID: %s)", guild.name, guild.id)
         
-        # Find the first text channel where the bot can send messages
-        welcome_channel = None
-        for channel in guild.text_channels:
-            if channel.permissions_for(guild.me).send_messages:
-                welcome_channel = channel
-                break
+        # Prefer the system channel, else the first text channel where the bot can send messages
+        me = guild.me
+        welcome_channel = guild.system_channel
+        if welcome_channel is None or not welcome_channel.permissions_for(me).send_messages:
+            welcome_channel = next(
+                (channel for channel in guild.text_channels if channel.permissions_for(me).send_messages),
+                None
+            )
         
         if welcome_channel:
             try:
-                # Create welcome embed
-                embed = discord.Embed(
-                    title="🤖 Dawg wit da butta on his head",
-                    description="Thanks for adding me to your server! I'm here to help you manage your to-do lists with deadlines and custom reminders.",
-                    color=discord.Color.green(),
-                    timestamp=discord.utils.utcnow()
-                )
-                
-                # Add command list
-                embed.add_field(
-                    name="📋 Available Commands",
-                    value=(
-                        "**To-Do Commands:**\n"
-                        "• `!add <task>` - Add a new task\n"
-                        "• `!add <task> | <deadline>` - Add task with deadline\n"
-                        "• `!list` - Show your to-do list\n"
-                        "• `!deadline <id> <deadline>` - Set deadline for a task\n"
-                        "• `!complete <id>` - Mark task as completed\n"
-                        "• `!uncomplete <id>` - Mark task as uncompleted\n"
-                        "• `!remove <id>` - Remove a task\n"
-                        "• `!clear` - Remove all completed tasks\n"
-                        "• `!clearall` - Remove all tasks\n\n"
-                        "**Reminder Commands:**\n"
-                        "• `!remindme <message> | <time>` - Set a custom reminder\n"
-                        "• `!reminders` - Show your active reminders\n"
-                        "• `!delreminder <id>` - Delete a specific reminder\n"
-                        "• `!clearreminders` - Delete all your reminders\n\n"
-                        "• `!help` - Show this help message"
-                    ),
-                    inline=False
-                )
-                
-                embed.add_field(
-                    name="⏰ Time Formats",
-                    value=(
-                        "**Deadlines:** `in 2 hours`, `2024-12-31 17:00`\n"
-                        "**Reminders:** `in 30 minutes`, `14:30`, `2024-12-31`\n"
-                        "**Both support:** relative time, specific dates/times"
-                    ),
-                    inline=True
-                )
-                
-                embed.add_field(
-                    name="🔒 Privacy & Security",
-                    value=(
-                        "• **Encrypted storage** - All data is encrypted\n"
-                        "• **User isolation** - Each user has private tasks\n"
-                        "• **Data hashing** - User IDs and content are hashed\n"
-                        "• **Private reminders** - Reminders sent via DM only"
-                    ),
-                    inline=True
-                )
-                
-                embed.set_footer(text="Use !help for detailed command information")
+                embed = discord.Embed.from_dict(_WELCOME_EMBED_DICT)
+                embed.timestamp = discord.utils.utcnow()
                 
                 await welcome_channel.send(embed=embed)
-                logger.info(f"Sent welcome message to {guild.name}")
+                logger.info("Sent welcome message to %s", guild.name)
                 
             except Exception as e:
-                logger.error(f"Failed to send welcome message to {guild.name}: {e}")
+                logger.error("Failed to send welcome message to %s: %s", guild.name, e)
     
     async def on_message(self, message):
         """Handle all messages (including DMs) - optimized"""
-        # Ignore messages from the bot itself
-        if message.author == self.user:
+        # Ignore messages from ourselves and other bots
+        author = message.author
+        if author.bot or author.id == self._self_id:
             return
         
-        # Check if this is a DM
-        if isinstance(message.channel, discord.DMChannel):
-            # Handle DM commands
-            if message.content.startswith(BOT_PREFIX):
-                # Create a context for DM commands
-                ctx = await self.get_context(message)
-                await self.invoke(ctx)
-            else:
-                # If it's not a command, send help - optimized with cached embed
-                await self._send_dm_help(message.channel)
+        # Non-command DMs get the help embed, at most once per cooldown per user
+        if message.channel.type is discord.ChannelType.private and message.content[:_PREFIX_LEN] != CFG.bot_prefix:
+            now = time.monotonic()
+            dm_help_sent = self._dm_help_sent
+            # Oldest replies come first - drop the expired ones so the map only holds users still on cooldown
+            while dm_help_sent:
+                oldest_id = next(iter(dm_help_sent))
+                if now - dm_help_sent[oldest_id] < CFG.dm_help_cooldown:
+                    break
+                del dm_help_sent[oldest_id]
+            if author.id in dm_help_sent:
+                return
+            dm_help_sent[author.id] = now
+            await self._send_dm_help(message.channel)
+            return
         
-        else:
-            # Handle server messages normally
-            await self.process_commands(message)
+        # Commands are handled the same way in DMs and servers
+        await self.process_commands(message)
     
     async def _send_dm_help(self, channel):
         """Send DM help message - optimized with cached embed"""
-        embed = discord.Embed(
-            title="🤖 To-Do Bot Help",
-            description="Welcome! I'm your personal to-do list manager. Here are the available commands:",
-            color=discord.Color.blue(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        embed.add_field(
-            name="📋 To-Do Commands",
-            value=(
-                "• `!add <task>` - Add a new task\n"
-                "• `!add <task> | <deadline>` - Add task with deadline\n"
-                "• `!list` - Show your to-do list\n"
-                "• `!deadline <id> <deadline>` - Set deadline for a task\n"
-                "• `!complete <id>` - Mark task as completed\n"
-                "• `!uncomplete <id>` - Mark task as uncompleted\n"
-                "• `!remove <id>` - Remove a task\n"
-                "• `!clear` - Remove all completed tasks\n"
-                "• `!clearall` - Remove all tasks"
-            ),
-            inline=True
-        )
-        
-        embed.add_field(
-            name="⏰ Reminder Commands",
-            value=(
-                "• `!remindme <message> | <time>` - Set a custom reminder\n"
-                "• `!reminders` - Show your active reminders\n"
-                "• `!delreminder <id>` - Delete a specific reminder\n"
-                "• `!clearreminders` - Delete all your reminders"
-            ),
-            inline=True
-        )
+        embed = discord.Embed.from_dict(_DM_HELP_EMBED_DICT)
+        embed.timestamp = discord.utils.utcnow()
         
-        embed.add_field(
-            name="⏰ Time Examples",
-            value=(
-                "• `!add Buy groceries | in 2 hours`\n"
-                "• `!remindme Take medicine | in 30 minutes`\n"
-                "• `!add Submit report | 2024-12-31 17:00`\n"
-                "• `!remindme Call dentist | 14:30`"
-            ),
-            inline=True
-        )
+        await channel.send(embed=embed)
+    
+    def schedule_reminder(self, when: Optional[datetime]):
+        """Wake the reminder loop if `when` is earlier than the time it is sleeping until"""
+        if when is None:
+            return
         
-        embed.add_field(
-            name="🔒 Privacy Features",
-            value=(
-                "• **Private to-do lists** - Only you can see your tasks\n"
-                "• **Encrypted storage** - All data is encrypted\n"
-                "• **Data hashing** - User IDs and content are hashed\n"
-                "• **Private reminders** - Reminders sent to you only"
-            ),
-            inline=True
-        )
+        if self._next_reminder_at is not None and self._next_reminder_at <= when:
+            return
         
-        embed.set_footer(text="Your data is encrypted and private - only you can see your tasks and reminders!")
+        self._reminder_wakeup.set()
+    
+    async def _reminder_loop(self):
+        """Send due reminders, then sleep until the next one is due or a new one is scheduled"""
+        # DMs need a logged-in connection
+        await self.wait_until_ready()
         
-        await channel.send(embed=embed)
+        while not self.is_closed():
+            # Clear before reading the database so a reminder added meanwhile still wakes us
+            self._reminder_wakeup.clear()
+            self._next_reminder_at = None
+            
+            next_due = None
+            try:
+                await self._process_due_reminders()
+                
+                todo_cog = self._todo_cog
+                if todo_cog:
+                    next_due = await asyncio.to_thread(todo_cog.db.get_next_due_time)
+            except Exception:
+                # One bad pass mustn't stop reminders for the rest of the process - retry on the interval
+                logger.exception("Error in reminder loop")
+                next_due = datetime.now()
+            
+            now = datetime.now()
+            if next_due is not None and next_due <= now:
+                # Items that failed to send stay due - retry them on the regular interval
+                next_due = now + timedelta(minutes=CFG.reminder_check_interval)
+            
+            # Nothing pending: sleep until schedule_reminder wakes us
+            timeout = (next_due - now).total_seconds() if next_due is not None else None
+            self._next_reminder_at = next_due
+            try:
+                await asyncio.wait_for(self._reminder_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
     
-    @tasks.loop(minutes=REMINDER_CHECK_INTERVAL)  # Configurable frequency for better performance
-    async def reminder_checker(self):
+    async def _process_due_reminders(self):
         """Check for due reminders and deadline reminders - optimized"""
+        # Get the todo commands cog
+        todo_cog = self._todo_cog
+        if not todo_cog:
+            logger.warning("TodoCommands cog not found for reminder checking")
+            return
+        
         try:
-            from todo_commands import TodoCommands
-            
-            # Get the todo commands cog
-            todo_cog = self.get_cog('TodoCommands')
-            if not todo_cog:
-                logger.warning("TodoCommands cog not found for reminder checking")
+            # Fast path: one cheap scan that stops at the first hit before any full fetch
+            if not await asyncio.to_thread(todo_cog.db.has_pending_work):
                 return
             
-            # Check for due custom reminders
-            due_reminders = todo_cog.db.get_due_reminders()
-            
-            # Process reminders in batches for better performance
-            reminder_batch = []
-            for reminder_info in due_reminders:
+            # Fetch due reminders and upcoming deadlines in one call - the scan runs off the event loop
+            due_reminders, upcoming_deadlines = await asyncio.to_thread(todo_cog.db.get_due_and_upcoming)
+        except Exception as e:
+            logger.error("Error fetching due reminders: %s", e)
+            return
+        
+        # One reference time for every embed and countdown in this run
+        tick_utc = discord.utils.utcnow()
+        now_ts = time.time()
+        
+        # Build each reminder and hand it to the send workers; a bad item doesn't stop the rest
+        for reminder_info in due_reminders:
+            try:
                 user_id = reminder_info['user_id']  # This is the actual user ID
                 hashed_user_id = reminder_info['hashed_user_id']  # Hashed version for database operations
                 reminder = reminder_info['reminder']
                 
                 if not user_id:
-                    logger.warning(f"Cannot send reminder for hashed user {hashed_user_id} - user ID not found in mapping")
+                    logger.warning("Cannot send reminder for hashed user %s - user ID not found in mapping", hashed_user_id)
+                    continue
+                
+                # Skip reminders that are already on their way
+                key = (hashed_user_id, reminder['id'])
+                if key in self._reminder_cache:
                     continue
                 
                 # Create reminder message
@@ -246,12 +370,12 @@ class TodoBot(commands.Bot):
                     title="🔔 Reminder!",
                     description=f"**{reminder['message']}**",
                     color=discord.Color.blue(),
-                    timestamp=discord.utils.utcnow()
+                    timestamp=tick_utc
                 )
                 
                 embed.add_field(
                     name="⏰ Set For",
-                    value=datetime.fromisoformat(reminder['reminder_time']).strftime("%Y-%m-%d %H:%M:%S"),
+                    value=reminder['reminder_time'][:19].replace('T', ' '),  # stored as ISO - no parse/strftime needed
                     inline=True
                 )
                 
@@ -263,29 +387,24 @@ class TodoBot(commands.Bot):
                 
                 embed.set_footer(text="This is a private reminder from your to-do bot")
                 
-                reminder_batch.append({
-                    'user_id': user_id,
-                    'hashed_user_id': hashed_user_id,
-                    'reminder': reminder,
-                    'embed': embed
-                })
-            
-            # Send reminders in parallel for better performance
-            if reminder_batch:
-                await self._send_reminder_batch(reminder_batch, todo_cog)
-            
-            # Check for upcoming deadline reminders
-            upcoming_deadlines = todo_cog.db.get_upcoming_deadlines()
-            
-            # Process deadline reminders in batches
-            deadline_batch = []
-            for deadline_info in upcoming_deadlines:
+                self._reminder_cache.add(key)
+                self._queue_send(user_id, (self._send_single_reminder, (user_id, hashed_user_id, reminder, embed, todo_cog)))
+            except Exception:
+                logger.exception("Failed to queue reminder for hashed user %s", reminder_info.get('hashed_user_id'))
+        
+        # Build each deadline reminder and hand it to the send workers
+        for deadline_info in upcoming_deadlines:
+            try:
                 user_id = deadline_info['user_id']  # This is now the actual user ID
                 hashed_user_id = deadline_info['hashed_user_id']  # Hashed version for database operations
                 task = deadline_info['task']
                 
                 if not user_id:
-                    logger.warning(f"Cannot send deadline reminder for hashed user {hashed_user_id} - user ID not found in mapping")
+                    logger.warning("Cannot send deadline reminder for hashed user %s - user ID not found in mapping", hashed_user_id)
+                    continue
+                
+                key = (hashed_user_id, 'd', task['id'])
+                if key in self._reminder_cache:
                     continue
                 
                 # Create deadline reminder message
@@ -293,7 +412,7 @@ class TodoBot(commands.Bot):
                     title="⏰ Deadline Reminder!",
                     description=f"**Task #{task['id']}:** {task['task']}",
                     color=discord.Color.orange(),
-                    timestamp=discord.utils.utcnow()
+                    timestamp=tick_utc
                 )
                 
                 # Add deadline information
@@ -305,11 +424,9 @@ class TodoBot(commands.Bot):
                 )
                 
                 # Calculate time remaining
-                deadline_dt = datetime.fromisoformat(deadline)
-                now = datetime.now()
-                time_diff = deadline_dt - now
+                seconds_left = task['deadline_ts'] - now_ts  # parsed at insert - no fromisoformat here
                 
-                if time_diff.total_seconds() <= 0:
+                if seconds_left <= 0:
                     embed.add_field(
                         name="⚠️ Status",
                         value="**OVERDUE**",
@@ -317,8 +434,7 @@ class TodoBot(commands.Bot):
                     )
                     embed.color = discord.Color.red()
                 else:
-                    hours = int(time_diff.total_seconds() // 3600)
-                    minutes = int((time_diff.total_seconds() % 3600) // 60)
+                    hours, minutes = divmod(int(seconds_left) // 60, 60)
                     
                     if hours > 0:
                         time_remaining = f"{hours}h {minutes}m remaining"
@@ -333,127 +449,153 @@ class TodoBot(commands.Bot):
                 
                 embed.set_footer(text="This is a private deadline reminder from your to-do bot")
                 
-                deadline_batch.append({
-                    'user_id': user_id,
-                    'hashed_user_id': hashed_user_id,
-                    'task': task,
-                    'embed': embed
-                })
-            
-            # Send deadline reminders in parallel
-            if deadline_batch:
-                await self._send_deadline_batch(deadline_batch, todo_cog)
-                    
-        except Exception as e:
-            logger.error(f"Error in reminder checker: {e}")
-    
-    async def _send_reminder_batch(self, reminder_batch, todo_cog):
-        """Send reminders in parallel for better performance"""
-        tasks = []
-        for reminder_data in reminder_batch:
-            user_id = reminder_data['user_id']
-            hashed_user_id = reminder_data['hashed_user_id']
-            reminder = reminder_data['reminder']
-            embed = reminder_data['embed']
-            
-            # Create task for sending reminder
-            task = self._send_single_reminder(user_id, hashed_user_id, reminder, embed, todo_cog)
-            tasks.append(task)
+                self._reminder_cache.add(key)
+                self._queue_send(user_id, (self._send_single_deadline_reminder, (user_id, hashed_user_id, task, embed, todo_cog)))
+            except Exception:
+                logger.exception("Failed to queue deadline reminder for hashed user %s", deadline_info.get('hashed_user_id'))
+        
+        # Wait for the workers so the next due time reflects what was sent; DMs deferred by
+        # pacing aren't queued yet and go out on their own timers
+        await self._send_queue.join()
         
-        # Execute all reminder sends in parallel
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        # Keep only the slots still ahead of us - deferred DMs hold their users' pacing
+        loop_now = asyncio.get_running_loop().time()
+        self._next_dm_at = {user_id: at for user_id, at in self._next_dm_at.items() if at > loop_now}
     
-    async def _send_deadline_batch(self, deadline_batch, todo_cog):
-        """Send deadline reminders in parallel for better performance"""
-        tasks = []
-        for deadline_data in deadline_batch:
-            user_id = deadline_data['user_id']
-            hashed_user_id = deadline_data['hashed_user_id']
-            task = deadline_data['task']
-            embed = deadline_data['embed']
-            
-            # Create task for sending deadline reminder
-            deadline_task = self._send_single_deadline_reminder(user_id, hashed_user_id, task, embed, todo_cog)
-            tasks.append(deadline_task)
+    def _queue_send(self, user_id: str, item: tuple):
+        """Hand a reminder DM to the workers, spacing out DMs to one user so a backlog doesn't run into per-recipient limits"""
+        # Deferred with call_at rather than slept on in a worker, so one user's backlog can't hold up everyone else's
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        send_at = max(now, self._next_dm_at.get(user_id, now))
+        self._next_dm_at[user_id] = send_at + CFG.dm_send_interval
+        if send_at > now:
+            loop.call_at(send_at, self._send_queue.put_nowait, item)
+        else:
+            self._send_queue.put_nowait(item)
+    
+    async def _send_worker(self):
+        """Send queued reminders one at a time until the bot shuts down"""
+        while True:
+            send, args = await self._send_queue.get()
+            try:
+                await send(*args)
+            except Exception as e:
+                logger.error("Unexpected error sending reminder: %s", e)
+            finally:
+                self._send_queue.task_done()
+    
+    async def _resolve_user(self, user_id: int) -> Optional[discord.User]:
+        """Get a user from the gateway cache, the local cache, or the API - in that order"""
+        user = self.get_user(user_id)
+        if user:
+            return user
+        
+        cached = self._user_cache.pop(user_id, None)
+        if cached and time.monotonic() - cached[1] < CFG.user_cache_ttl:
+            self._user_cache[user_id] = cached  # Re-insert so dict order tracks recency
+            return cached[0]
+        
+        # Several reminders for one user are sent concurrently - share a single fetch
+        pending = self._user_fetches.get(user_id)
+        if pending is not None:
+            return await pending
+        
+        pending = asyncio.ensure_future(self.fetch_user(user_id))
+        self._user_fetches[user_id] = pending
+        try:
+            user = await pending
+        finally:
+            del self._user_fetches[user_id]
         
-        # Execute all deadline reminder sends in parallel
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        # Newest entry goes last; the least recently used one is dropped past CACHE_SIZE
+        self._user_cache[user_id] = (user, time.monotonic())
+        if len(self._user_cache) > CFG.cache_size:
+            del self._user_cache[next(iter(self._user_cache))]
+        return user
     
     async def _send_single_reminder(self, user_id, hashed_user_id, reminder, embed, todo_cog):
         """Send a single reminder with error handling"""
         try:
             # Get the user
-            user = await self.fetch_user(int(user_id))
+            user = await self._resolve_user(int(user_id))
             if not user:
                 return
             
             # Send private message
             await user.send(embed=embed)
-            logger.info(f"Sent custom reminder to user {user_id}: {reminder['message']}")
+            logger.info("Sent custom reminder to user %s: %s", user_id, reminder['message'])
             
             # Mark reminder as sent using hashed user ID
             todo_cog.db.mark_reminder_sent(hashed_user_id, reminder['id'])
             
         except discord.Forbidden:
-            logger.warning(f"Cannot send DM to user {user_id} - DMs disabled")
+            logger.warning("Cannot send DM to user %s - DMs disabled", user_id)
         except Exception as e:
-            logger.error(f"Failed to send custom reminder to user {user_id}: {e}")
+            logger.error("Failed to send custom reminder to user %s: %s", user_id, e)
+        finally:
+            self._reminder_cache.discard((hashed_user_id, reminder['id']))
     
     async def _send_single_deadline_reminder(self, user_id, hashed_user_id, task, embed, todo_cog):
         """Send a single deadline reminder with error handling"""
         try:
             # Get the user
-            user = await self.fetch_user(int(user_id))
+            user = await self._resolve_user(int(user_id))
             if not user:
                 return
             
             # Send private message
             await user.send(embed=embed)
-            logger.info(f"Sent deadline reminder to user {user_id} for task #{task['id']}")
+            logger.info("Sent deadline reminder to user %s for task #%s", user_id, task['id'])
             
             # Mark deadline reminder as sent using hashed user ID
             todo_cog.db.mark_deadline_reminder_sent(hashed_user_id, task['id'])
             
         except discord.Forbidden:
-            logger.warning(f"Cannot send DM to user {user_id} - DMs disabled")
+            logger.warning("Cannot send DM to user %s - DMs disabled", user_id)
         except Exception as e:
-            logger.error(f"Failed to send deadline reminder to user {user_id}: {e}")
-    
-    @reminder_checker.before_loop
-    async def before_reminder_checker(self):
-        """Wait until the bot is ready before starting the reminder checker"""
-        await self.wait_until_ready()
-        logger.info("Reminder checker started")
+            logger.error("Failed to send deadline reminder to user %s: %s", user_id, e)
+        finally:
+            self._reminder_cache.discard((hashed_user_id, 'd', task['id']))
     
     async def on_command_error(self, ctx, error):
         """Handle command errors - optimized"""
-        if isinstance(error, commands.CommandNotFound):
-            await ctx.send("❌ Command not found! Use `!help` to see available commands.")
-        elif isinstance(error, commands.MissingRequiredArgument):
-            await ctx.send(f"❌ Missing required argument: {error.param}")
-        elif isinstance(error, commands.BadArgument):
-            await ctx.send("❌ Invalid argument provided. Please check your input.")
-        else:
-            logger.error(f"Unhandled command error: {error}")
-            await ctx.send("❌ An unexpected error occurred. Please try again.")
+        # Walk the MRO so subclasses (e.g. MemberNotFound -> BadArgument) still match;
+        # the exact type is the first entry, so the common case is one dict lookup
+        for error_type in type(error).__mro__:
+            handler = _ERROR_REPLIES.get(error_type)
+            if handler is not None:
+                await ctx.send(handler(error) if callable(handler) else handler)
+                return
+        
+        logger.error("Unhandled command error: %s", error)
+        await ctx.send("❌ An unexpected error occurred. Please try again.")
 
 async def main():
     """Main function to run the bot"""
     bot = TodoBot()
     
-    if not DISCORD_TOKEN:
+    if not CFG.discord_token:
         logger.error("❌ No Discord token found! Please set the DISCORD_TOKEN environment variable.")
         return
     
     try:
         logger.info("Starting bot...")
-        await bot.start(DISCORD_TOKEN)
+        # The context manager closes the bot on exit, unloading the cog so pending writes are saved
+        # (skipped if the database failed to load, so a wrong key can't overwrite it)
+        async with bot:
+            # Ctrl+C cancels main() through the runner; make SIGTERM (service managers, docker stop) close cleanly too
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(bot.close()))
+            except (NotImplementedError, AttributeError):
+                pass  # Not supported on Windows event loops
+            await bot.start(CFG.discord_token)
     except discord.LoginFailure:
         logger.error("❌ Invalid Discord token! Please check your token.")
     except Exception as e:
-        logger.error(f"❌ Failed to start bot: {e}")
+        logger.error("❌ Failed to start bot: %s", e)
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    # uvloop.install() is deprecated; pass the loop factory to the runner instead
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop is not None else None) as runner:
+        runner.run(main()) 
\ No newline at end of file
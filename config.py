@@ -1,33 +1,70 @@
 import os
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Bot Configuration
-DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
-BOT_PREFIX = '!'
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Read-only bot settings, read from the environment once at import"""
+    # Bot Configuration
+    discord_token: Optional[str]
+    bot_prefix: str
 
-# Database Configuration
-DATABASE_FILE = 'todo_database.json'
+    # Database Configuration
+    database_file: str
 
-# Encryption Configuration
-ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY', 'your-secret-key-change-this-in-production')
-ENABLE_ENCRYPTION = os.getenv('ENABLE_ENCRYPTION', 'true').lower() == 'true'
+    # Encryption Configuration
+    encryption_key: str
+    enable_encryption: bool
+    user_hash_algorithm: str  # Keyed hash for user IDs in newly created databases: 'blake2b' or 'hmac-sha256'; existing ones keep theirs
+    key_cache_file: str  # Master key cached in plaintext (mode 0600) so PBKDF2 only runs once; empty disables
 
-# Bot Settings
-MAX_TASKS_PER_USER = 50
-MAX_TASK_LENGTH = 200
+    # Bot Settings
+    max_tasks_per_user: int
+    max_task_length: int
 
-# Performance Settings
-REMINDER_CHECK_INTERVAL = int(os.getenv('REMINDER_CHECK_INTERVAL', '2'))  # minutes
-DATABASE_SAVE_DEBOUNCE = int(os.getenv('DATABASE_SAVE_DEBOUNCE', '30'))  # seconds
-MAX_REMINDERS_PER_USER = 20
-DEADLINE_REMINDER_HOURS = 12
+    # Performance Settings
+    reminder_check_interval: int  # minutes
+    database_save_debounce: int  # seconds between journal fsyncs
+    database_flush_delay: float  # seconds a burst of changes is batched before writing
+    wal_compact_size: int  # journal bytes before compaction
+    max_reminders_per_user: int
+    deadline_reminder_hours: int
+    dm_help_cooldown: int  # seconds between help replies to non-command DMs
 
-# Cache Settings
-CACHE_SIZE = int(os.getenv('CACHE_SIZE', '128'))
-MAX_CONCURRENT_REMINDERS = int(os.getenv('MAX_CONCURRENT_REMINDERS', '10'))
+    # Cache Settings
+    cache_size: int
+    user_cache_ttl: int  # seconds
+    max_concurrent_reminders: int
+    dm_send_interval: float  # seconds between reminder DMs to the same user
 
-# Logging Configuration
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
-LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s' 
\ No newline at end of file
+    # Logging Configuration
+    log_level: str
+    log_format: str
+
+CFG = Config(
+    discord_token=os.getenv('DISCORD_TOKEN'),
+    bot_prefix='!',
+    database_file='todo_database.json',
+    encryption_key=os.getenv('ENCRYPTION_KEY', 'your-secret-key-change-this-in-production'),
+    enable_encryption=os.getenv('ENABLE_ENCRYPTION', 'true').lower() == 'true',
+    user_hash_algorithm=os.getenv('USER_HASH_ALGORITHM', 'blake2b'),
+    key_cache_file=os.path.expanduser(os.getenv('KEY_CACHE_FILE', '~/.cache/todo_bot/master.key')),
+    max_tasks_per_user=50,
+    max_task_length=200,
+    reminder_check_interval=int(os.getenv('REMINDER_CHECK_INTERVAL', '2')),
+    database_save_debounce=int(os.getenv('DATABASE_SAVE_DEBOUNCE', '30')),
+    database_flush_delay=float(os.getenv('DATABASE_FLUSH_DELAY', '0.25')),
+    wal_compact_size=int(os.getenv('WAL_COMPACT_SIZE', str(1024 * 1024))),
+    max_reminders_per_user=20,
+    deadline_reminder_hours=12,
+    dm_help_cooldown=60,
+    cache_size=int(os.getenv('CACHE_SIZE', '128')),
+    user_cache_ttl=int(os.getenv('USER_CACHE_TTL', '3600')),
+    max_concurrent_reminders=int(os.getenv('MAX_CONCURRENT_REMINDERS', '10')),
+    dm_send_interval=float(os.getenv('DM_SEND_INTERVAL', '1')),
+    log_level=os.getenv('LOG_LEVEL', 'INFO'),
+    log_format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+)
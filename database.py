@@ -1,267 +1,650 @@
-import json
 import os
+import time
 import base64
 import hashlib
 import hmac
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import heapq
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import orjson
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from config import DATABASE_FILE, ENCRYPTION_KEY, ENABLE_ENCRYPTION, DATABASE_SAVE_DEBOUNCE, MAX_REMINDERS_PER_USER, DEADLINE_REMINDER_HOURS
+from config import CFG
+
+_KDF_SALT = b'todo_bot_salt'  # Fixed salt for consistency
+_KDF_ITERATIONS = 100000
+
+# Snapshot and journal blobs: version byte + 12-byte nonce + AES-256-GCM ciphertext and tag, raw binary.
+# Older Fernet blobs start with base64 text, so they never begin with this byte
+_BLOB_VERSION = b'\x01'
+
+# Journal records written before the sections were split use these names
+_LEGACY_SECTIONS = {None: 'tasks', 'user_mapping': 'user_map'}
+
+# Field tokens: prefix + base64(12-byte nonce || AES-256-GCM ciphertext and tag)
+_FIELD_PREFIX = 'gcm:'
+
+_SECRET = CFG.encryption_key.encode()  # Encoded once, not per hash
+
+# Keyed once; copying it skips recomputing the HMAC key pads on every hash
+_HMAC_TEMPLATE = hmac.new(_SECRET, digestmod=hashlib.sha256)
+
+def _hmac_hex(data: str) -> str:
+    """HMAC-SHA256 of a string under ENCRYPTION_KEY, as hex"""
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(data.encode())
+    return mac.hexdigest()
+
+# BLAKE2b is keyed natively (one C call, no HMAC wrapper); keys over 64 bytes are hashed down to fit
+_BLAKE2B_KEY = _SECRET if len(_SECRET) <= 64 else hashlib.blake2b(_SECRET).digest()
+
+def _blake2b_hex(data: str) -> str:
+    """Keyed BLAKE2b-256 of a string, as hex"""
+    return hashlib.blake2b(data.encode(), key=_BLAKE2B_KEY, digest_size=32).hexdigest()
+
+# Keyed hashes for user IDs and content; a database keeps the one it was created with
+_HASHERS = {
+    'hmac-sha256': _hmac_hex,
+    'blake2b': _blake2b_hex
+}
+
+@lru_cache(maxsize=CFG.cache_size)
+def _hash_user_id_cached(algorithm: str, user_id: str) -> str:
+    """Hash a user ID - the key is fixed for the process, so results can be memoized"""
+    return _HASHERS[algorithm](user_id)
 
 class TodoDatabase:
     def __init__(self):
-        self.db_file = DATABASE_FILE
-        self.fernet = self._setup_encryption()
-        self.data = self._load_data()
-        if 'user_mapping' not in self.data:
-            self.data['user_mapping'] = {}
-        if 'reminders' not in self.data:
-            self.data['reminders'] = {}
+        self.db_file = CFG.database_file
+        self.wal_file = CFG.database_file + '.wal'
+        self._field_cipher = None
+        self._blob_cipher = None
+        self._legacy_fernet = None  # Only reads blobs and fields written before AES-GCM
+        self._encryption_enabled = self._setup_encryption()
+        # Set when the snapshot or journal can't be read (wrong key, corruption) - writing
+        # would replace the real data with what little loaded, so nothing is saved
+        self._load_failed = False
+        data = self._load_data()
+        if self._load_failed:
+            print("Warning: Database could not be read - running without saving changes until it is fixed")
+        # hashed user ID -> {task ID: task}, {reminder ID: reminder}, and encrypted real user ID
+        self._tasks = data['tasks']
+        self._reminders = data['reminders']
+        self._user_map = data['user_map']
+        self._meta = data['meta']
+        self._sections = data
+        self._index_records()
+        # The heaps are scanned on a worker thread (bot.py uses to_thread) while commands push
+        # on the event loop - every heap access holds this lock
+        self._heap_lock = threading.Lock()
+        self._build_heaps()
+        
+        # Real user IDs, decrypted once in a batch - the encrypted map is only for what goes to disk
+        self._user_id_plain = {hashed_user_id: self._decrypt_field(token) for hashed_user_id, token in self._user_map.items()}
         
         # Add caching for better performance
         self._cache = {}
-        self._last_save = datetime.now()
-        self._save_pending = False
+        
+        # Mutations are appended to a journal instead of rewriting the whole file.
+        # Changed buckets are collected in _dirty and written by flush(); when on_dirty is set,
+        # it is called instead of flushing inline so a background writer can batch the writes
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self.on_dirty = None
+        self._wal = open(self.wal_file, 'ab')
+        self._last_fsync = time.monotonic()
+        self._unsynced = False  # Journal writes not yet fsynced
+        if self._wal.tell() > CFG.wal_compact_size:
+            self.compact()
+        
+        # Databases from before the hash was recorded already hold HMAC-SHA256 user IDs
+        if 'hash' not in self._meta and not self._load_failed:
+            has_data = self._tasks or self._reminders or self._user_map
+            self._meta['hash'] = 'hmac-sha256' if has_data else CFG.user_hash_algorithm
+            self._journal('meta', 'hash')
+        self._meta.setdefault('hash', 'hmac-sha256')
+        if self._meta['hash'] not in _HASHERS:
+            print(f"Warning: Unknown hash algorithm '{self._meta['hash']}', using hmac-sha256")
+            self._meta['hash'] = 'hmac-sha256'
+        self._hasher = _HASHERS[self._meta['hash']]
     
-    def _setup_encryption(self) -> Optional[Fernet]:
-        """Set up encryption if enabled"""
-        if not ENABLE_ENCRYPTION:
-            return None
+    def _setup_encryption(self) -> bool:
+        """Set up encryption if enabled - returns whether it is on"""
+        if not CFG.enable_encryption:
+            return False
         
         try:
-            # Generate a key from the encryption key using PBKDF2
-            salt = b'todo_bot_salt'  # Fixed salt for consistency
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(ENCRYPTION_KEY.encode()))
-            return Fernet(key)
+            master_key = self._derive_master_key()
+            
+            # Separate keys for field encryption and authentication, derived from the same secret
+            self._field_cipher = AESGCM(hmac.new(master_key, b'field-encryption', hashlib.sha256).digest())
+            self._blob_cipher = AESGCM(hmac.new(master_key, b'blob-encryption', hashlib.sha256).digest())
+            
+            self._legacy_fernet = Fernet(base64.urlsafe_b64encode(master_key))
+            return True
         except Exception as e:
             print(f"Warning: Failed to setup encryption: {e}")
-            return None
+            return False
+    
+    def _derive_master_key(self) -> bytes:
+        """Derive the master key with PBKDF2, reusing the copy cached on disk by an earlier start"""
+        # Ties the cached key to the current secret, so changing ENCRYPTION_KEY re-derives
+        fingerprint = hmac.new(_SECRET, _KDF_SALT, hashlib.sha256).hexdigest()
+        
+        if CFG.key_cache_file:
+            try:
+                with open(CFG.key_cache_file, 'rb') as f:
+                    cached = orjson.loads(f.read())
+                if (cached['salt'] == _KDF_SALT.hex() and cached['iterations'] == _KDF_ITERATIONS and
+                        hmac.compare_digest(cached['fingerprint'], fingerprint)):
+                    return bytes.fromhex(cached['key'])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Warning: Ignoring unreadable key cache: {e}")
+        
+        # Generate a key from the encryption key using PBKDF2
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=_KDF_SALT,
+            iterations=_KDF_ITERATIONS,
+        )
+        master_key = kdf.derive(_SECRET)
+        
+        if CFG.key_cache_file:
+            try:
+                os.makedirs(os.path.dirname(CFG.key_cache_file) or '.', mode=0o700, exist_ok=True)
+                # Owner-only from creation; the chmod also tightens a file that already existed
+                fd = os.open(CFG.key_cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(orjson.dumps({
+                        'salt': _KDF_SALT.hex(),
+                        'iterations': _KDF_ITERATIONS,
+                        'fingerprint': fingerprint,
+                        'key': master_key.hex()
+                    }))
+                os.chmod(CFG.key_cache_file, 0o600)
+            except Exception as e:
+                print(f"Warning: Failed to cache encryption key: {e}")
+        
+        return master_key
     
     def _hash_user_id(self, user_id: str) -> str:
-        """Hash user ID for privacy"""
-        secret = ENCRYPTION_KEY.encode()
-        return hmac.new(secret, user_id.encode(), hashlib.sha256).hexdigest()
+        """Hash user ID for privacy - memoized, since the same users send command after command"""
+        return _hash_user_id_cached(self._meta['hash'], user_id)
     
     def _hash_task_content(self, task_content: str) -> str:
         """Hash task content for privacy"""
-        secret = ENCRYPTION_KEY.encode()
-        return hmac.new(secret, task_content.encode(), hashlib.sha256).hexdigest()
+        return self._hasher(task_content)
+    
+    def _decrypt_data(self, encrypted_data: str) -> str:
+        """Decrypt a field written by older versions with Fernet"""
+        try:
+            return self._legacy_fernet.decrypt(encrypted_data.encode()).decode()
+        except Exception as e:
+            print(f"Warning: Failed to decrypt data: {e}")
+            return encrypted_data
     
-    def _encrypt_data(self, data: str) -> str:
-        """Encrypt data if encryption is enabled"""
-        if not self.fernet:
+    def _encrypt_bytes(self, data: bytes) -> bytes:
+        """Encrypt raw bytes with AES-256-GCM if encryption is enabled - binary output, no base64"""
+        if not self._encryption_enabled:
             return data
         try:
-            return self.fernet.encrypt(data.encode()).decode()
+            nonce = os.urandom(12)
+            return _BLOB_VERSION + nonce + self._blob_cipher.encrypt(nonce, data, None)
         except Exception as e:
             print(f"Warning: Failed to encrypt data: {e}")
             return data
     
-    def _decrypt_data(self, encrypted_data: str) -> str:
-        """Decrypt data if encryption is enabled"""
-        if not self.fernet:
+    def _decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """Decrypt raw bytes if encryption is enabled; older Fernet blobs are still read"""
+        if not self._encryption_enabled:
             return encrypted_data
         try:
-            return self.fernet.decrypt(encrypted_data.encode()).decode()
+            if encrypted_data[:1] == _BLOB_VERSION:
+                return self._blob_cipher.decrypt(encrypted_data[1:13], encrypted_data[13:], None)
+            return self._legacy_fernet.decrypt(encrypted_data)
         except Exception as e:
             print(f"Warning: Failed to decrypt data: {e}")
             return encrypted_data
     
+    def _encrypt_field(self, value: str) -> str:
+        """Encrypt one stored field with AES-256-GCM"""
+        if not self._encryption_enabled:
+            return value
+        nonce = os.urandom(12)
+        return _FIELD_PREFIX + base64.urlsafe_b64encode(nonce + self._field_cipher.encrypt(nonce, value.encode(), None)).decode()
+    
+    def _decrypt_field(self, token: str) -> str:
+        """Decrypt one stored field; older Fernet fields are still read"""
+        if not self._encryption_enabled:
+            return token
+        if not token.startswith(_FIELD_PREFIX):
+            return self._decrypt_data(token)
+        try:
+            raw = base64.urlsafe_b64decode(token[len(_FIELD_PREFIX):])
+            return self._field_cipher.decrypt(raw[:12], raw[12:], None).decode()
+        except Exception as e:
+            print(f"Warning: Failed to decrypt data: {e}")
+            return token
+    
+    def _decrypt_fields(self, records: List[Dict], source: str, target: str):
+        """Decrypt one field across many records, replacing the encrypted copy"""
+        for record in records:
+            if source in record:
+                record[target] = self._decrypt_field(record.pop(source))
+    
     def _load_data(self) -> Dict:
         """Load data from file with decryption"""
-        if not os.path.exists(self.db_file):
-            return {}
-        
         try:
-            with open(self.db_file, 'r', encoding='utf-8') as f:
-                encrypted_content = f.read()
+            # Raw bytes straight into the decryptor - no text decoding of the ciphertext
+            encrypted_content = Path(self.db_file).read_bytes()
             
             if encrypted_content.strip():
-                decrypted_content = self._decrypt_data(encrypted_content)
-                return json.loads(decrypted_content)
+                data = orjson.loads(self._decrypt_bytes(encrypted_content))
             else:
-                return {}
+                data = {}
+        except FileNotFoundError:
+            data = {}
         except Exception as e:
             print(f"Warning: Failed to load database: {e}")
-            return {}
-    
-    def _save_data(self, force: bool = False):
-        """Save data to file with encryption - optimized with debouncing"""
-        now = datetime.now()
+            self._load_failed = True
+            data = {}
         
-        # Only save if forced, or if it's been more than the configured debounce time since last save
-        if not force and (now - self._last_save).total_seconds() < DATABASE_SAVE_DEBOUNCE:
-            self._save_pending = True
+        data = self._migrate_layout(data)
+        self._replay_wal(data)
+        return data
+    
+    @staticmethod
+    def _migrate_layout(data: Dict) -> Dict:
+        """Split older files, which kept task buckets next to 'user_mapping'/'reminders', into sections"""
+        if 'tasks' not in data:
+            data = {
+                'tasks': {hashed_user_id: tasks for hashed_user_id, tasks in data.items()
+                          if hashed_user_id not in ('user_mapping', 'reminders')},
+                'reminders': data.get('reminders', {}),
+                'user_map': data.get('user_mapping', {})
+            }
+        for section in ('tasks', 'reminders', 'user_map', 'meta'):
+            data.setdefault(section, {})
+        return data
+    
+    def _replay_wal(self, data: Dict):
+        """Apply journaled bucket writes on top of the loaded snapshot"""
+        try:
+            journal = Path(self.wal_file).read_bytes()
+        except FileNotFoundError:
             return
         
+        pos = 0
+        while pos + 4 <= len(journal):
+            size = int.from_bytes(journal[pos:pos + 4], 'big')
+            record = journal[pos + 4:pos + 4 + size]
+            if len(record) < size:
+                # Torn final write - drop it so new records aren't appended after garbage
+                with open(self.wal_file, 'r+b') as f:
+                    f.truncate(pos)
+                break
+            pos += 4 + size
+            try:
+                entry = orjson.loads(self._decrypt_bytes(record))
+            except Exception as e:
+                print(f"Warning: Skipping unreadable journal record: {e}")
+                self._load_failed = True
+                continue
+            
+            section = _LEGACY_SECTIONS.get(entry['s'], entry['s'])
+            container = data.setdefault(section, {})
+            if entry['v'] is None:
+                container.pop(entry['k'], None)
+            else:
+                container[entry['k']] = entry['v']
+    
+    @staticmethod
+    def _to_timestamp(iso_time: Optional[str]) -> Optional[float]:
+        """Convert a stored ISO time to epoch seconds, or None if missing/invalid"""
+        if not iso_time:
+            return None
+        try:
+            return datetime.fromisoformat(iso_time).timestamp()
+        except ValueError:
+            return None
+    
+    def _index_records(self):
+        """Key each user's stored task/reminder lists by ID, upgrading records from older files"""
+        # The whole file is encrypted, so older per-field ciphertexts are decrypted once here
+        self._decrypt_fields([reminder for reminders in self._reminders.values() for reminder in reminders],
+                             'message_encrypted', 'message')
+        self._decrypt_fields([task for tasks in self._tasks.values() for task in tasks],
+                             'task_encrypted', 'task')
+        
+        for hashed_user_id, reminders in self._reminders.items():
+            self._reminders[hashed_user_id] = {reminder['id']: reminder for reminder in reminders}
+            for reminder in reminders:
+                if 'reminder_time_ts' not in reminder:
+                    reminder['reminder_time_ts'] = self._to_timestamp(reminder['reminder_time'])
+        
+        for hashed_user_id, tasks in self._tasks.items():
+            self._tasks[hashed_user_id] = {task['id']: task for task in tasks}
+            for task in tasks:
+                if 'deadline_ts' not in task:
+                    task['deadline_ts'] = self._to_timestamp(task.get('deadline'))
+    
+    def _build_heaps(self):
+        """Index pending reminders and deadlines by due time, so scans only touch what has fired"""
+        # Entries are (timestamp, hashed user ID, record ID); stale ones are dropped lazily when they surface
+        self._reminder_heap = [(reminder['reminder_time_ts'], hashed_user_id, reminder_id)
+                               for hashed_user_id, reminders in self._reminders.items()
+                               for reminder_id, reminder in reminders.items()
+                               if reminder['reminder_time_ts'] is not None and not reminder.get('sent', False)]
+        self._deadline_heap = [(task['deadline_ts'], hashed_user_id, task_id)
+                               for hashed_user_id, tasks in self._tasks.items()
+                               for task_id, task in tasks.items()
+                               if (task['deadline_ts'] is not None and
+                                   not task['completed'] and
+                                   not task.get('reminder_sent', False))]
+        heapq.heapify(self._reminder_heap)
+        heapq.heapify(self._deadline_heap)
+    
+    def _pending_reminder(self, entry: Tuple[float, str, int]) -> Optional[Dict]:
+        """The unsent reminder a heap entry points at, or None if the entry is stale"""
+        due_at, hashed_user_id, reminder_id = entry
+        reminder = self._reminders.get(hashed_user_id, {}).get(reminder_id)
+        if reminder and not reminder.get('sent', False) and reminder['reminder_time_ts'] == due_at:
+            return reminder
+        return None
+    
+    def _pending_deadline(self, entry: Tuple[float, str, int], now_ts: float) -> Optional[Dict]:
+        """The task a deadline heap entry points at if it still needs a reminder, or None if stale"""
+        deadline_ts, hashed_user_id, task_id = entry
+        if deadline_ts < now_ts:
+            return None  # Deadlines that already passed are never reminded about
+        task = self._tasks.get(hashed_user_id, {}).get(task_id)
+        if (task and not task['completed'] and not task.get('reminder_sent', False) and
+                task['deadline_ts'] == deadline_ts):
+            return task
+        return None
+    
+    def _prune_heaps(self, now_ts: float):
+        """Drop stale entries from the top of both heaps - callers hold _heap_lock"""
+        while self._reminder_heap and self._pending_reminder(self._reminder_heap[0]) is None:
+            heapq.heappop(self._reminder_heap)
+        while self._deadline_heap and self._pending_deadline(self._deadline_heap[0], now_ts) is None:
+            heapq.heappop(self._deadline_heap)
+    
+    def _serialize(self) -> Dict:
+        """Build the on-disk form: one object per section, per-user records as lists"""
+        # May run on the writer thread while commands mutate - iterate over snapshots
+        return {
+            'tasks': {hashed_user_id: list(tasks.values())
+                      for hashed_user_id, tasks in list(self._tasks.items())},
+            'reminders': {hashed_user_id: list(reminders.values())
+                          for hashed_user_id, reminders in list(self._reminders.items())},
+            'user_map': dict(self._user_map),
+            'meta': dict(self._meta)
+        }
+    
+    def _journal(self, section: str, key: str):
+        """Mark one bucket as changed - it is appended to the journal on the next flush"""
+        with self._dirty_lock:
+            self._dirty.add((section, key))
+        if self.on_dirty is None:
+            self.flush()  # No background writer - write through
+        else:
+            self.on_dirty()
+    
+    def flush(self):
+        """Append every changed bucket to the journal - O(bucket) each, and a bucket edited many times is written once"""
+        with self._io_lock:
+            with self._dirty_lock:
+                dirty, self._dirty = self._dirty, set()
+            if not dirty or self._load_failed:
+                return
+            
+            try:
+                records = []
+                for section, key in dirty:
+                    value = self._sections[section].get(key)
+                    if isinstance(value, dict):
+                        value = list(value.values())  # ID-keyed records are stored as lists
+                    record = self._encrypt_bytes(orjson.dumps({'s': section, 'k': key, 'v': value}))
+                    records.append(len(record).to_bytes(4, 'big') + record)
+                
+                self._wal.write(b''.join(records))
+                self._wal.flush()
+                self._unsynced = True
+                
+                # fsync on an interval rather than per write; a process crash loses nothing either way,
+                # and sync() covers the writes left over once things go quiet
+                if time.monotonic() - self._last_fsync >= CFG.database_save_debounce:
+                    self._sync()
+                
+                if self._wal.tell() > CFG.wal_compact_size:
+                    self._compact()
+            except Exception as e:
+                print(f"Error writing database journal: {e}")
+    
+    def sync(self):
+        """fsync journal writes still waiting for the fsync interval"""
+        with self._io_lock:
+            self._sync()
+    
+    def _sync(self):
+        """sync() body - callers hold _io_lock"""
+        if self._unsynced:
+            os.fsync(self._wal.fileno())
+            self._unsynced = False
+        self._last_fsync = time.monotonic()
+    
+    def compact(self):
+        """Rewrite the snapshot from memory and empty the journal"""
+        with self._io_lock:
+            self._compact()
+    
+    def _compact(self):
+        """compact() body - callers hold _io_lock"""
+        if self._load_failed:
+            return  # Never overwrite a snapshot that couldn't be read
+        
         try:
-            json_content = json.dumps(self.data, indent=2, ensure_ascii=False)
-            encrypted_content = self._encrypt_data(json_content)
+            # Compact output - no indentation bytes to encrypt and write
+            encrypted_content = self._encrypt_bytes(orjson.dumps(self._serialize(), option=orjson.OPT_SORT_KEYS))
             
-            with open(self.db_file, 'w', encoding='utf-8') as f:
+            # Write a sibling file and swap it in, so a crash mid-write leaves the old snapshot intact
+            tmp_file = self.db_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
                 f.write(encrypted_content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.db_file)
             
-            self._last_save = now
-            self._save_pending = False
+            # Only drop the journal once the snapshot holds everything in it
+            self._wal.close()
+            self._wal = open(self.wal_file, 'wb')
+            self._unsynced = False
+            self._last_fsync = time.monotonic()
         except Exception as e:
             print(f"Error saving database: {e}")
     
-    def _get_user_tasks(self, hashed_user_id: str) -> List[Dict]:
-        """Get tasks for a user with caching"""
-        if hashed_user_id not in self._cache:
-            self._cache[hashed_user_id] = self.data.get(hashed_user_id, [])
-        return self._cache[hashed_user_id]
+    def dump_pretty(self) -> str:
+        """Readable, indented JSON of the whole database for debugging"""
+        return orjson.dumps(self._serialize(), option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()
     
-    def _update_user_tasks(self, hashed_user_id: str, tasks: List[Dict]):
+    def _get_user_tasks(self, hashed_user_id: str) -> Dict[int, Dict]:
+        """Get tasks for a user, keyed by task ID, with caching"""
+        tasks = self._cache.get(hashed_user_id)
+        if tasks is None:
+            tasks = self._cache[hashed_user_id] = self._tasks.get(hashed_user_id, {})
+        return tasks
+    
+    def _set_user_mapping(self, hashed_user_id: str, user_id: str):
+        """Store the encrypted real user ID, journaling it only the first time"""
+        if hashed_user_id in self._user_id_plain:
+            return
+        self._user_id_plain[hashed_user_id] = user_id
+        self._user_map[hashed_user_id] = self._encrypt_field(user_id)
+        self._journal('user_map', hashed_user_id)
+    
+    def _update_user_tasks(self, hashed_user_id: str, tasks: Dict[int, Dict]):
         """Update tasks for a user with caching"""
-        self.data[hashed_user_id] = tasks
+        self._tasks[hashed_user_id] = tasks
         self._cache[hashed_user_id] = tasks
-        self._save_data()
+        self._journal('tasks', hashed_user_id)
     
-    def add_task(self, user_id: str, task: str, deadline: Optional[str] = None) -> bool:
-        """Add a task to the user's to-do list with optional deadline"""
+    def add_task(self, user_id: str, task: str, deadline: Optional[str] = None) -> Optional[int]:
+        """Add a task to the user's to-do list with optional deadline - returns the new task ID, or None if full"""
         hashed_user_id = self._hash_user_id(user_id)
         
         # Store encrypted actual user ID for DM reminders
-        self.data['user_mapping'][hashed_user_id] = self._encrypt_data(user_id)
+        self._set_user_mapping(hashed_user_id, user_id)
         
         tasks = self._get_user_tasks(hashed_user_id)
         
-        if len(tasks) >= 50:
-            return False
+        if len(tasks) >= CFG.max_tasks_per_user:
+            return None
         
-        task_id = len(tasks) + 1
+        # IDs stay stable when other tasks are removed
+        task_id = max(tasks, default=0) + 1
         hashed_task = self._hash_task_content(task)
         
         task_data = {
             'id': task_id,
             'task_hash': hashed_task,
-            'task_encrypted': self._encrypt_data(task),
+            'task': task,
             'completed': False,
             'created_at': datetime.now().isoformat(),
             'completed_at': None,
             'deadline': deadline,
+            'deadline_ts': self._to_timestamp(deadline),  # Parsed once here so reminder scans skip fromisoformat
             'reminder_sent': False
         }
         
-        tasks.append(task_data)
+        tasks[task_id] = task_data
         self._update_user_tasks(hashed_user_id, tasks)
-        return True
+        if task_data['deadline_ts'] is not None:
+            with self._heap_lock:
+                heapq.heappush(self._deadline_heap, (task_data['deadline_ts'], hashed_user_id, task_id))
+        return task_id
     
     def get_tasks(self, user_id: str) -> List[Dict]:
-        """Get all tasks for a user"""
+        """Get all tasks for a user - copies, so callers can't change stored records behind the journal"""
         hashed_user_id = self._hash_user_id(user_id)
-        tasks = self._get_user_tasks(hashed_user_id)
-        
-        # Decrypt tasks in batch for better performance
-        for task in tasks:
-            if 'task_encrypted' in task:
-                task['task'] = self._decrypt_data(task['task_encrypted'])
-        
-        return tasks
+        return [dict(task) for task in self._get_user_tasks(hashed_user_id).values()]
     
     def get_task(self, user_id: str, task_id: int) -> Optional[Dict]:
         """Get a specific task by ID"""
         hashed_user_id = self._hash_user_id(user_id)
-        tasks = self._get_user_tasks(hashed_user_id)
+        task = self._get_user_tasks(hashed_user_id).get(task_id)
         
-        # Use list comprehension for better performance
-        matching_tasks = [task for task in tasks if task['id'] == task_id]
-        if not matching_tasks:
+        return dict(task) if task is not None else None
+    
+    def update_task(self, user_id: str, task_id: int, **fields) -> Optional[Dict]:
+        """Update a task's fields in one lookup and journal it - returns a copy of the updated task, or None if not found"""
+        hashed_user_id = self._hash_user_id(user_id)
+        task = self._get_user_tasks(hashed_user_id).get(task_id)
+        if task is None:
             return None
         
-        task = matching_tasks[0]
-        # Decrypt task content for display
-        if 'task_encrypted' in task:
-            task['task'] = self._decrypt_data(task['task_encrypted'])
-        return task
+        # Keep the derived fields in step with the deadline; completion goes through complete_task/uncomplete_task
+        if 'deadline' in fields:
+            fields['deadline_ts'] = self._to_timestamp(fields['deadline'])
+            fields.setdefault('reminder_sent', False)  # Re-arm the reminder
+        
+        task.update(fields)
+        self._journal('tasks', hashed_user_id)
+        
+        # A new deadline needs its reminder back on the heap
+        if 'deadline' in fields and task['deadline_ts'] is not None and not task.get('reminder_sent', False):
+            with self._heap_lock:
+                heapq.heappush(self._deadline_heap, (task['deadline_ts'], hashed_user_id, task_id))
+        return dict(task)
     
-    def complete_task(self, user_id: str, task_id: int) -> bool:
-        """Mark a task as completed"""
+    def set_deadline(self, user_id: str, task_id: int, deadline: str) -> bool:
+        """Set or update a task's deadline and re-arm its reminder"""
+        return self.update_task(user_id, task_id, deadline=deadline) is not None
+    
+    def complete_task(self, user_id: str, task_id: int) -> Optional[Dict]:
+        """Mark a task as completed - returns the task as it was before, or None if not found"""
         hashed_user_id = self._hash_user_id(user_id)
         tasks = self._get_user_tasks(hashed_user_id)
         
-        for task in tasks:
-            if task['id'] == task_id and not task['completed']:
-                task['completed'] = True
-                task['completed_at'] = datetime.now().isoformat()
-                self._update_user_tasks(hashed_user_id, tasks)
-                return True
+        task = tasks.get(task_id)
+        if task is None:
+            return None
         
-        return False
+        previous = dict(task)
+        if not task['completed']:
+            task['completed'] = True
+            task['completed_at'] = datetime.now().isoformat()
+            self._update_user_tasks(hashed_user_id, tasks)
+        return previous
     
-    def uncomplete_task(self, user_id: str, task_id: int) -> bool:
-        """Mark a task as uncompleted"""
+    def uncomplete_task(self, user_id: str, task_id: int) -> Optional[Dict]:
+        """Mark a task as uncompleted - returns the task as it was before, or None if not found"""
         hashed_user_id = self._hash_user_id(user_id)
         tasks = self._get_user_tasks(hashed_user_id)
         
-        for task in tasks:
-            if task['id'] == task_id and task['completed']:
-                task['completed'] = False
-                task['completed_at'] = None
-                self._update_user_tasks(hashed_user_id, tasks)
-                return True
+        task = tasks.get(task_id)
+        if task is None:
+            return None
         
-        return False
+        previous = dict(task)
+        if task['completed']:
+            task['completed'] = False
+            task['completed_at'] = None
+            self._update_user_tasks(hashed_user_id, tasks)
+            if task['deadline_ts'] is not None and not task.get('reminder_sent', False):
+                with self._heap_lock:
+                    heapq.heappush(self._deadline_heap, (task['deadline_ts'], hashed_user_id, task_id))
+        return previous
     
-    def remove_task(self, user_id: str, task_id: int) -> bool:
-        """Remove a task"""
+    def remove_task(self, user_id: str, task_id: int) -> Optional[Dict]:
+        """Remove a task - returns the removed task, or None if not found"""
         hashed_user_id = self._hash_user_id(user_id)
         tasks = self._get_user_tasks(hashed_user_id)
         
-        # Use list comprehension for better performance
-        filtered_tasks = [task for task in tasks if task['id'] != task_id]
+        removed = tasks.pop(task_id, None)
+        if removed is None:
+            return None  # Task not found
         
-        if len(filtered_tasks) == len(tasks):
-            return False  # Task not found
-        
-        # Reorder remaining task IDs
-        for i, task in enumerate(filtered_tasks, 1):
-            task['id'] = i
-        
-        self._update_user_tasks(hashed_user_id, filtered_tasks)
-        return True
+        self._update_user_tasks(hashed_user_id, tasks)
+        return removed
     
     def clear_completed_tasks(self, user_id: str) -> int:
         """Remove all completed tasks"""
         hashed_user_id = self._hash_user_id(user_id)
         tasks = self._get_user_tasks(hashed_user_id)
         
-        completed_tasks = [task for task in tasks if task['completed']]
-        remaining_tasks = [task for task in tasks if not task['completed']]
+        # One pass; the cleared count falls out of the size difference
+        remaining_tasks = {task_id: task for task_id, task in tasks.items() if not task['completed']}
+        cleared = len(tasks) - len(remaining_tasks)
         
-        # Reorder remaining task IDs
-        for i, task in enumerate(remaining_tasks, 1):
-            task['id'] = i
-        
-        self._update_user_tasks(hashed_user_id, remaining_tasks)
-        return len(completed_tasks)
+        if cleared:
+            self._update_user_tasks(hashed_user_id, remaining_tasks)
+        return cleared
     
     def clear_all_tasks(self, user_id: str) -> int:
         """Remove all tasks for a user"""
         hashed_user_id = self._hash_user_id(user_id)
-        tasks = self._get_user_tasks(hashed_user_id)
-        task_count = len(tasks)
+        task_count = len(self._get_user_tasks(hashed_user_id))
         
         # Clear tasks and cache
-        if hashed_user_id in self.data:
-            del self.data[hashed_user_id]
-        if hashed_user_id in self._cache:
-            del self._cache[hashed_user_id]
+        self._tasks.pop(hashed_user_id, None)
+        self._cache.pop(hashed_user_id, None)
         
         # Remove user mapping
-        if hashed_user_id in self.data['user_mapping']:
-            del self.data['user_mapping'][hashed_user_id]
+        self._user_map.pop(hashed_user_id, None)
+        self._user_id_plain.pop(hashed_user_id, None)
         
-        self._save_data()
+        self._journal('tasks', hashed_user_id)
+        self._journal('user_map', hashed_user_id)
         return task_count
     
     def add_reminder(self, user_id: str, message: str, reminder_time: str) -> bool:
@@ -269,184 +652,163 @@ class TodoDatabase:
         hashed_user_id = self._hash_user_id(user_id)
         
         # Store encrypted actual user ID for DM reminders
-        self.data['user_mapping'][hashed_user_id] = self._encrypt_data(user_id)
+        self._set_user_mapping(hashed_user_id, user_id)
         
-        if hashed_user_id not in self.data['reminders']:
-            self.data['reminders'][hashed_user_id] = []
+        reminders = self._reminders.setdefault(hashed_user_id, {})
         
         # Check maximum reminders per user
-        if len(self.data['reminders'][hashed_user_id]) >= MAX_REMINDERS_PER_USER:
+        if len(reminders) >= CFG.max_reminders_per_user:
             return False
         
-        reminder_id = len(self.data['reminders'][hashed_user_id]) + 1
+        reminder_id = max(reminders, default=0) + 1
         hashed_message = self._hash_task_content(message)
         
         reminder_data = {
             'id': reminder_id,
             'message_hash': hashed_message,
-            'message_encrypted': self._encrypt_data(message),
+            'message': message,
             'reminder_time': reminder_time,
+            'reminder_time_ts': self._to_timestamp(reminder_time),
             'created_at': datetime.now().isoformat(),
             'sent': False
         }
         
-        self.data['reminders'][hashed_user_id].append(reminder_data)
-        self._save_data()
+        reminders[reminder_id] = reminder_data
+        self._journal('reminders', hashed_user_id)
+        if reminder_data['reminder_time_ts'] is not None:
+            with self._heap_lock:
+                heapq.heappush(self._reminder_heap, (reminder_data['reminder_time_ts'], hashed_user_id, reminder_id))
         return True
     
     def get_reminders(self, user_id: str) -> List[Dict]:
-        """Get all reminders for a user"""
+        """Get all reminders for a user - copies, like get_tasks"""
         hashed_user_id = self._hash_user_id(user_id)
-        reminders = self.data['reminders'].get(hashed_user_id, [])
-        
-        # Decrypt reminders in batch
-        for reminder in reminders:
-            if 'message_encrypted' in reminder:
-                reminder['message'] = self._decrypt_data(reminder['message_encrypted'])
-        
-        return reminders
+        return [dict(reminder) for reminder in self._reminders.get(hashed_user_id, {}).values()]
     
     def delete_reminder(self, user_id: str, reminder_id: int) -> bool:
         """Delete a specific reminder"""
         hashed_user_id = self._hash_user_id(user_id)
-        reminders = self.data['reminders'].get(hashed_user_id, [])
-        
-        # Use list comprehension for better performance
-        filtered_reminders = [reminder for reminder in reminders if reminder['id'] != reminder_id]
+        reminders = self._reminders.get(hashed_user_id, {})
         
-        if len(filtered_reminders) == len(reminders):
+        if reminders.pop(reminder_id, None) is None:
             return False  # Reminder not found
         
-        # Reorder remaining reminder IDs
-        for j, remaining_reminder in enumerate(filtered_reminders, 1):
-            remaining_reminder['id'] = j
-        
-        self.data['reminders'][hashed_user_id] = filtered_reminders
-        self._save_data()
+        self._journal('reminders', hashed_user_id)
         return True
     
     def clear_reminders(self, user_id: str) -> int:
         """Clear all reminders for a user"""
         hashed_user_id = self._hash_user_id(user_id)
-        reminder_count = len(self.data['reminders'].get(hashed_user_id, []))
-        
-        if hashed_user_id in self.data['reminders']:
-            del self.data['reminders'][hashed_user_id]
+        reminder_count = len(self._reminders.pop(hashed_user_id, {}))
+        if not reminder_count:
+            return 0  # Nothing cleared - no journal write
         
-        self._save_data()
+        self._journal('reminders', hashed_user_id)
         return reminder_count
     
+    def get_due_and_upcoming(self, hours_ahead: int = CFG.deadline_reminder_hours) -> Tuple[List[Dict], List[Dict]]:
+        """Get due reminders and upcoming deadlines together"""
+        return self.get_due_reminders(), self.get_upcoming_deadlines(hours_ahead)
+    
     def get_due_reminders(self) -> List[Dict]:
-        """Get all reminders that are due to be sent - optimized"""
+        """Get all reminders that are due to be sent - pops only fired entries off the heap"""
         due_reminders = []
-        now = datetime.now()
-        
-        for hashed_user_id, reminders in self.data['reminders'].items():
-            if hashed_user_id == 'user_mapping':  # Skip the mapping data
-                continue
-            
-            # Filter due reminders in one pass
-            due_user_reminders = []
-            for reminder in reminders:
-                if not reminder.get('sent', False):
-                    try:
-                        reminder_time = datetime.fromisoformat(reminder['reminder_time'])
-                        if reminder_time <= now:
-                            # Decrypt message for sending
-                            if 'message_encrypted' in reminder:
-                                reminder['message'] = self._decrypt_data(reminder['message_encrypted'])
-                            
-                            due_user_reminders.append(reminder)
-                    except ValueError:
-                        continue
-            
-            if due_user_reminders:
-                # Get actual user ID for DM
-                actual_user_id = None
-                if hashed_user_id in self.data['user_mapping']:
-                    encrypted_user_id = self.data['user_mapping'][hashed_user_id]
-                    actual_user_id = self._decrypt_data(encrypted_user_id)
+        now_ts = time.time()
+        
+        fired = set()
+        heap = self._reminder_heap
+        with self._heap_lock:
+            while heap and heap[0][0] <= now_ts:
+                entry = heapq.heappop(heap)
+                reminder = self._pending_reminder(entry)
+                if reminder is None or entry in fired:
+                    continue  # Stale or duplicate entry
+                fired.add(entry)
                 
-                for reminder in due_user_reminders:
-                    due_reminders.append({
-                        'user_id': actual_user_id,
-                        'hashed_user_id': hashed_user_id,
-                        'reminder': reminder
-                    })
+                due_reminders.append({
+                    'user_id': self._user_id_plain.get(entry[1]),
+                    'hashed_user_id': entry[1],
+                    'reminder': dict(reminder)
+                })
+            
+            # Entries stay indexed until marked sent, so a failed DM is retried on the next check
+            for entry in fired:
+                heapq.heappush(heap, entry)
         
         return due_reminders
     
-    def get_upcoming_deadlines(self, hours_ahead: int = DEADLINE_REMINDER_HOURS) -> List[Dict]:
-        """Get all tasks with deadlines approaching within the specified hours - optimized"""
+    def get_upcoming_deadlines(self, hours_ahead: int = CFG.deadline_reminder_hours) -> List[Dict]:
+        """Get all tasks with deadlines approaching within the specified hours - pops only fired entries"""
         upcoming_tasks = []
-        now = datetime.now()
-        cutoff_time = now + timedelta(hours=hours_ahead)
-        
-        for hashed_user_id, tasks in self.data.items():
-            # Skip the user_mapping and reminders keys
-            if hashed_user_id in ['user_mapping', 'reminders']:
-                continue
-            
-            # Filter tasks with upcoming deadlines in one pass
-            upcoming_user_tasks = []
-            for task in tasks:
-                if (task.get('deadline') and 
-                    not task['completed'] and 
-                    not task.get('reminder_sent', False)):
-                    
-                    try:
-                        deadline = datetime.fromisoformat(task['deadline'])
-                        if now <= deadline <= cutoff_time:
-                            # Decrypt task content for the reminder
-                            if 'task_encrypted' in task:
-                                task['task'] = self._decrypt_data(task['task_encrypted'])
-                            
-                            upcoming_user_tasks.append(task)
-                    except ValueError:
-                        # Skip tasks with invalid deadline format
-                        continue
-            
-            if upcoming_user_tasks:
-                # Get the actual user ID from mapping
-                actual_user_id = None
-                if hashed_user_id in self.data['user_mapping']:
-                    encrypted_user_id = self.data['user_mapping'][hashed_user_id]
-                    actual_user_id = self._decrypt_data(encrypted_user_id)
+        now_ts = time.time()
+        cutoff_ts = now_ts + hours_ahead * 3600
+        
+        fired = set()
+        heap = self._deadline_heap
+        with self._heap_lock:
+            while heap and heap[0][0] <= cutoff_ts:
+                entry = heapq.heappop(heap)
+                task = self._pending_deadline(entry, now_ts)
+                if task is None or entry in fired:
+                    continue  # Stale, passed or duplicate entry
+                fired.add(entry)
                 
-                for task in upcoming_user_tasks:
-                    upcoming_tasks.append({
-                        'user_id': actual_user_id,  # Use actual user ID for reminders
-                        'hashed_user_id': hashed_user_id,  # Keep hashed version for database operations
-                        'task': task
-                    })
+                upcoming_tasks.append({
+                    'user_id': self._user_id_plain.get(entry[1]),  # Use actual user ID for reminders
+                    'hashed_user_id': entry[1],  # Keep hashed version for database operations
+                    'task': dict(task)
+                })
+            
+            for entry in fired:
+                heapq.heappush(heap, entry)
         
         return upcoming_tasks
+
+    def has_pending_work(self, hours_ahead: int = CFG.deadline_reminder_hours) -> bool:
+        """Check whether any reminder or deadline reminder is due - only looks at the heap tops"""
+        now_ts = time.time()
+        with self._heap_lock:
+            self._prune_heaps(now_ts)
+            return bool((self._reminder_heap and self._reminder_heap[0][0] <= now_ts) or
+                        (self._deadline_heap and self._deadline_heap[0][0] <= now_ts + hours_ahead * 3600))
     
+    def get_next_due_time(self, hours_ahead: int = CFG.deadline_reminder_hours) -> Optional[datetime]:
+        """Get the earliest time a reminder or deadline reminder becomes due"""
+        candidates = []
+        with self._heap_lock:
+            self._prune_heaps(time.time())
+            if self._reminder_heap:
+                candidates.append(self._reminder_heap[0][0])
+            if self._deadline_heap:
+                candidates.append(self._deadline_heap[0][0] - hours_ahead * 3600)
+        
+        return datetime.fromtimestamp(min(candidates)) if candidates else None
+
     def mark_reminder_sent(self, hashed_user_id: str, reminder_id: int) -> bool:
         """Mark a reminder as sent"""
-        reminders = self.data['reminders'].get(hashed_user_id, [])
+        reminder = self._reminders.get(hashed_user_id, {}).get(reminder_id)
         
-        for reminder in reminders:
-            if reminder['id'] == reminder_id:
-                reminder['sent'] = True
-                self._save_data()
-                return True
+        if reminder:
+            reminder['sent'] = True
+            self._journal('reminders', hashed_user_id)
+            return True
         
         return False
     
     def mark_deadline_reminder_sent(self, hashed_user_id: str, task_id: int) -> bool:
         """Mark that a deadline reminder has been sent for a task"""
-        if hashed_user_id not in self.data:
-            return False
+        task = self._tasks.get(hashed_user_id, {}).get(task_id)
         
-        for task in self.data[hashed_user_id]:
-            if task['id'] == task_id:
-                task['reminder_sent'] = True
-                self._save_data()
-                return True
+        if task:
+            task['reminder_sent'] = True
+            self._journal('tasks', hashed_user_id)
+            return True
         
         return False
     
     def force_save(self):
         """Force save the database immediately"""
-        self._save_data(force=True) 
\ No newline at end of file
+        if self._load_failed:
+            print("Warning: Not saving - the database failed to load, so the files on disk are left as they are")
+            return
+        self.compact() 
\ No newline at end of file
@@ -1,113 +1,130 @@
 import time
 import psutil
 import asyncio
-from datetime import datetime, timedelta
+from collections import defaultdict, deque
+from itertools import islice
+from datetime import datetime
 from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _new_timing_stats(window: int) -> Dict:
+    """The last `window` samples for one command/operation, with their running sum, min and max"""
+    # Samples are kept as integer nanoseconds so adding and evicting them never drifts the sum.
+    # 'mins'/'maxs' are monotonic (sample number, time) deques - their fronts are the window's min and max
+    return {'seq': 0, 'sum_ns': 0, 'recent': deque(maxlen=window), 'mins': deque(), 'maxs': deque()}
+
+def _add_timing(stats: Dict, execution_time: float):
+    """Add one sample, dropping the oldest past the window - sum, min and max stay current in amortized O(1)"""
+    sample_ns = round(execution_time * 1e9)
+    recent = stats['recent']
+    if len(recent) == recent.maxlen:
+        stats['sum_ns'] -= recent[0]  # About to be evicted by the append
+    recent.append(sample_ns)
+    stats['sum_ns'] += sample_ns
+    
+    seq = stats['seq']
+    stats['seq'] = seq + 1
+    oldest = seq - recent.maxlen  # Samples numbered this or lower have left the window
+    mins, maxs = stats['mins'], stats['maxs']
+    while mins and mins[-1][1] >= sample_ns:
+        mins.pop()
+    while maxs and maxs[-1][1] <= sample_ns:
+        maxs.pop()
+    mins.append((seq, sample_ns))
+    maxs.append((seq, sample_ns))
+    if mins[0][0] <= oldest:
+        mins.popleft()
+    if maxs[0][0] <= oldest:
+        maxs.popleft()
+
+def _timing_summary(stats: Dict, count_key: str) -> Dict:
+    """avg/min/max/count for one window, read off the accumulators _add_timing keeps - no pass over samples"""
+    count = len(stats['recent'])
+    return {
+        'avg_time': stats['sum_ns'] / count / 1e9,
+        'min_time': stats['mins'][0][1] / 1e9,
+        'max_time': stats['maxs'][0][1] / 1e9,
+        count_key: count
+    }
+
 class PerformanceMonitor:
     """Monitor bot performance metrics"""
     
     def __init__(self):
         self.start_time = datetime.now()
-        self.command_times = {}
-        self.db_operations = {}
-        self.reminder_checks = []
-        self.memory_usage = []
+        # Bounded windows - appends drop the oldest entry instead of re-slicing lists
+        self.command_times = defaultdict(lambda: _new_timing_stats(100))
+        self.db_operations = defaultdict(lambda: _new_timing_stats(50))
+        self.reminder_checks = deque(maxlen=100)
+        self.memory_usage = deque(maxlen=100)
         self.cpu_usage = []
+        # One Process handle for the bot's lifetime; cpu_percent() measures since its previous call
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)
         
     def record_command(self, command_name: str, execution_time: float):
         """Record command execution time"""
-        if command_name not in self.command_times:
-            self.command_times[command_name] = []
-        self.command_times[command_name].append(execution_time)
-        
-        # Keep only last 100 entries per command
-        if len(self.command_times[command_name]) > 100:
-            self.command_times[command_name] = self.command_times[command_name][-100:]
+        _add_timing(self.command_times[command_name], execution_time)
     
     def record_db_operation(self, operation: str, execution_time: float):
         """Record database operation time"""
-        if operation not in self.db_operations:
-            self.db_operations[operation] = []
-        self.db_operations[operation].append(execution_time)
-        
-        # Keep only last 50 entries per operation
-        if len(self.db_operations[operation]) > 50:
-            self.db_operations[operation] = self.db_operations[operation][-50:]
+        _add_timing(self.db_operations[operation], execution_time)
     
     def record_reminder_check(self, reminders_sent: int, deadlines_sent: int, execution_time: float):
         """Record reminder check performance"""
         self.reminder_checks.append({
-            'timestamp': datetime.now(),
+            'ts': time.monotonic(),
             'reminders_sent': reminders_sent,
             'deadlines_sent': deadlines_sent,
             'execution_time': execution_time
         })
-        
-        # Keep only last 100 entries
-        if len(self.reminder_checks) > 100:
-            self.reminder_checks = self.reminder_checks[-100:]
     
     def record_system_metrics(self):
         """Record current system metrics"""
         try:
-            process = psutil.Process()
-            memory_info = process.memory_info()
-            cpu_percent = process.cpu_percent()
+            memory_info = self._process.memory_info()
+            cpu_percent = self._process.cpu_percent(None)  # Non-blocking
             
             self.memory_usage.append({
-                'timestamp': datetime.now(),
+                'ts': time.monotonic(),
                 'rss': memory_info.rss,  # Resident Set Size in bytes
                 'vms': memory_info.vms,  # Virtual Memory Size in bytes
                 'cpu_percent': cpu_percent
             })
-            
-            # Keep only last 100 entries
-            if len(self.memory_usage) > 100:
-                self.memory_usage = self.memory_usage[-100:]
                 
         except Exception as e:
-            logger.warning(f"Failed to record system metrics: {e}")
+            logger.warning("Failed to record system metrics: %s", e)
     
     def get_performance_summary(self) -> Dict:
         """Get a summary of performance metrics"""
         uptime = datetime.now() - self.start_time
         
         # Calculate command performance
-        command_stats = {}
-        for cmd, times in self.command_times.items():
-            if times:
-                command_stats[cmd] = {
-                    'avg_time': sum(times) / len(times),
-                    'min_time': min(times),
-                    'max_time': max(times),
-                    'total_calls': len(times)
-                }
+        command_stats = {cmd: _timing_summary(stats, 'total_calls')
+                         for cmd, stats in self.command_times.items() if stats['recent']}
         
         # Calculate database performance
-        db_stats = {}
-        for op, times in self.db_operations.items():
-            if times:
-                db_stats[op] = {
-                    'avg_time': sum(times) / len(times),
-                    'min_time': min(times),
-                    'max_time': max(times),
-                    'total_operations': len(times)
-                }
+        db_stats = {op: _timing_summary(stats, 'total_operations')
+                    for op, stats in self.db_operations.items() if stats['recent']}
         
         # Calculate reminder check performance
         reminder_stats = {}
         if self.reminder_checks:
-            recent_checks = self.reminder_checks[-10:]  # Last 10 checks
-            avg_execution_time = sum(check['execution_time'] for check in recent_checks) / len(recent_checks)
-            total_reminders_sent = sum(check['reminders_sent'] for check in recent_checks)
-            total_deadlines_sent = sum(check['deadlines_sent'] for check in recent_checks)
+            # One pass over the last 10 checks for all three totals
+            total_execution_time = 0.0
+            total_reminders_sent = 0
+            total_deadlines_sent = 0
+            check_count = 0
+            for check in islice(reversed(self.reminder_checks), 10):
+                total_execution_time += check['execution_time']
+                total_reminders_sent += check['reminders_sent']
+                total_deadlines_sent += check['deadlines_sent']
+                check_count += 1
             
             reminder_stats = {
-                'avg_execution_time': avg_execution_time,
+                'avg_execution_time': total_execution_time / check_count,
                 'total_reminders_sent': total_reminders_sent,
                 'total_deadlines_sent': total_deadlines_sent,
                 'checks_recorded': len(self.reminder_checks)
@@ -116,9 +133,16 @@ class PerformanceMonitor:
         # Calculate system metrics
         system_stats = {}
         if self.memory_usage:
-            recent_memory = self.memory_usage[-10:]  # Last 10 measurements
-            avg_memory_mb = sum(usage['rss'] for usage in recent_memory) / len(recent_memory) / 1024 / 1024
-            avg_cpu = sum(usage['cpu_percent'] for usage in recent_memory) / len(recent_memory)
+            # One pass over the last 10 measurements
+            total_rss = 0
+            total_cpu = 0.0
+            sample_count = 0
+            for usage in islice(reversed(self.memory_usage), 10):
+                total_rss += usage['rss']
+                total_cpu += usage['cpu_percent']
+                sample_count += 1
+            avg_memory_mb = total_rss / sample_count / 1024 / 1024
+            avg_cpu = total_cpu / sample_count
             
             system_stats = {
                 'avg_memory_mb': avg_memory_mb,
@@ -134,8 +158,8 @@ class PerformanceMonitor:
             'db_stats': db_stats,
             'reminder_stats': reminder_stats,
             'system_stats': system_stats,
-            'total_commands': sum(len(times) for times in self.command_times.values()),
-            'total_db_operations': sum(len(times) for times in self.db_operations.values())
+            'total_commands': sum(len(stats['recent']) for stats in self.command_times.values()),
+            'total_db_operations': sum(len(stats['recent']) for stats in self.db_operations.values())
         }
     
     def get_performance_embed(self) -> Optional[Dict]:
@@ -213,34 +237,21 @@ class PerformanceMonitor:
             return embed
             
         except Exception as e:
-            logger.error(f"Failed to create performance embed: {e}")
+            logger.error("Failed to create performance embed: %s", e)
             return None
     
     def clear_old_data(self):
         """Clear old performance data to prevent memory bloat"""
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        
-        # Clear old reminder checks
-        self.reminder_checks = [
-            check for check in self.reminder_checks 
-            if check['timestamp'] > cutoff_time
-        ]
+        cutoff_ts = time.monotonic() - 24 * 3600
         
-        # Clear old system metrics
-        self.memory_usage = [
-            usage for usage in self.memory_usage 
-            if usage['timestamp'] > cutoff_time
-        ]
+        # Entries are appended in time order, so old ones are all at the left end
+        while self.reminder_checks and self.reminder_checks[0]['ts'] <= cutoff_ts:
+            self.reminder_checks.popleft()
         
-        # Clear old command times (keep only last 50 per command)
-        for cmd in self.command_times:
-            if len(self.command_times[cmd]) > 50:
-                self.command_times[cmd] = self.command_times[cmd][-50:]
+        while self.memory_usage and self.memory_usage[0]['ts'] <= cutoff_ts:
+            self.memory_usage.popleft()
         
-        # Clear old db operations (keep only last 25 per operation)
-        for op in self.db_operations:
-            if len(self.db_operations[op]) > 25:
-                self.db_operations[op] = self.db_operations[op][-25:]
+        # Command and db operation windows are already bounded by their deques
 
 # Global performance monitor instance
 performance_monitor = PerformanceMonitor() 
\ No newline at end of file
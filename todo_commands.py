@@ -1,48 +1,123 @@
+import asyncio
 import discord
 import re
+import time
 from discord.ext import commands
 from database import TodoDatabase
-from config import MAX_TASK_LENGTH
+from config import CFG
 from datetime import datetime, timedelta
 from functools import lru_cache
+from typing import Optional
+
+# Deadline formats, compiled once instead of going through re's internal cache on every parse
+_RE_HOUR = re.compile(r'(\d+)\s*hour')
+_RE_DAY = re.compile(r'(\d+)\s*day')
+_RE_WEEK = re.compile(r'(\d+)\s*week')
+_RE_MINUTE = re.compile(r'(\d+)\s*minute')
+_RE_ABSOLUTE = re.compile(
+    r'(?:(?P<ymd_hm>\d{4}-\d{2}-\d{2} \d{2}:\d{2})'
+    r'|(?P<mdy_hm>\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2})'
+    r'|(?P<hm>(?P<hour>\d{1,2}):(?P<minute>\d{2}))'
+    r'|(?P<ymd>\d{4}-\d{2}-\d{2})'
+    r'|(?P<mdy>\d{1,2}/\d{1,2}/\d{4}))$'
+)
+# strptime format for each _RE_ABSOLUTE group
+_ABSOLUTE_FORMATS = {
+    'ymd_hm': '%Y-%m-%d %H:%M',
+    'mdy_hm': '%m/%d/%Y %H:%M',
+    'ymd': '%Y-%m-%d',
+    'mdy': '%m/%d/%Y',
+}
+
+# Relative reminder offsets ("in 2 hours"): one pass over the string, unit -> seconds.
+# When several units appear, the earliest in this order wins ("in 2 hours 1 day" is one day)
+_UNIT_RE = re.compile(r'(\d+)\s*(year|month|week|day|hour|minute|min|hr)')
+_UNIT_SECONDS = {
+    'year': 365 * 86400,
+    'month': 30 * 86400,
+    'week': 7 * 86400,
+    'day': 86400,
+    'hour': 3600,
+    'minute': 60,
+    'min': 60,
+    'hr': 3600,
+}
+_UNIT_RANK = {unit: rank for rank, unit in enumerate(_UNIT_SECONDS)}
+
+# Absolute reminder formats keyed by (date separator, number of ':'), so only matching shapes hit strptime
+_REMINDER_FORMATS = {
+    ('-', 0): ('%Y-%m-%d',),
+    ('/', 0): ('%m/%d/%Y', '%d/%m/%Y'),
+    ('-', 1): ('%Y-%m-%d %H:%M',),
+    ('/', 1): ('%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M'),
+    ('-', 2): ('%Y-%m-%d %H:%M:%S',),
+    ('/', 2): ('%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S'),
+}
+
+# !list suffix for a pending task's deadline, by _deadline_view status
+_DEADLINE_SUFFIX = {
+    'overdue': " 🔴 (Overdue: {deadline})",
+    'urgent': " 🟡 (Due soon: {remaining})",
+    'upcoming': " ⏰ (Due: {remaining})",
+}
+
+@lru_cache(maxsize=512)
+def _cached_strptime(fmt: str, date_string: str) -> datetime:
+    """datetime.strptime memoized on (format, string) - users repeat the same deadlines"""
+    return datetime.strptime(date_string, fmt)
+
+@lru_cache(maxsize=1024)
+def _iso_to_dt(iso_string: str) -> datetime:
+    """datetime.fromisoformat memoized - !list and !reminders re-parse the same stored strings"""
+    return datetime.fromisoformat(iso_string)
 
 class TodoCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = TodoDatabase()
-        
-        # Cache for datetime parsing patterns
-        self._time_patterns = [
-            (r'(\d+)\s*years?', lambda x: timedelta(days=x*365)),
-            (r'(\d+)\s*months?', lambda x: timedelta(days=x*30)),
-            (r'(\d+)\s*weeks?', lambda x: timedelta(weeks=x)),
-            (r'(\d+)\s*days?', lambda x: timedelta(days=x)),
-            (r'(\d+)\s*hours?', lambda x: timedelta(hours=x)),
-            (r'(\d+)\s*minutes?', lambda x: timedelta(minutes=x)),
-            (r'(\d+)\s*mins?', lambda x: timedelta(minutes=x)),
-            (r'(\d+)\s*hrs?', lambda x: timedelta(hours=x)),
-            (r'(\d+)\s*hr', lambda x: timedelta(hours=x)),
-            (r'(\d+)\s*min', lambda x: timedelta(minutes=x))
-        ]
-        
-        self._date_formats = [
-            "%Y-%m-%d %H:%M",
-            "%m/%d/%Y %H:%M",
-            "%d/%m/%Y %H:%M",
-            "%Y-%m-%d %H:%M:%S",
-            "%m/%d/%Y %H:%M:%S",
-            "%d/%m/%Y %H:%M:%S"
-        ]
-        
-        self._date_only_formats = [
-            "%Y-%m-%d",
-            "%m/%d/%Y",
-            "%d/%m/%Y"
-        ]
+        self._save_event = None
+        self._writer_task = None
+    
+    async def cog_load(self):
+        """Start the background writer that batches database journal writes"""
+        self._save_event = asyncio.Event()
+        self.db.on_dirty = self._save_event.set
+        self._writer_task = asyncio.create_task(self._writer_loop())
+    
+    async def cog_unload(self):
+        """Stop the writer and save everything, so nothing is lost and the next start has no journal to replay"""
+        self.db.on_dirty = None
+        if self._writer_task:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        self.db.force_save()
+    
+    async def _writer_loop(self):
+        """Journal changed buckets shortly after a burst of commands, off the event loop thread"""
+        while True:
+            try:
+                # asyncio.timeout rather than wait_for, which can swallow a cancel that races the event on 3.11
+                async with asyncio.timeout(CFG.database_save_debounce):
+                    await self._save_event.wait()
+            except TimeoutError:
+                # Quiet for a whole interval - make the last writes durable instead of waiting for the next one
+                try:
+                    await asyncio.to_thread(self.db.sync)
+                except Exception as e:
+                    print(f"Error syncing database: {e}")
+                continue
+            await asyncio.sleep(CFG.database_flush_delay)  # Let the rest of the burst land first
+            self._save_event.clear()
+            try:
+                await asyncio.to_thread(self.db.flush)
+            except Exception as e:
+                print(f"Error flushing database: {e}")
     
-    @lru_cache(maxsize=128)
     def _parse_deadline(self, deadline_str: str) -> str:
-        """Parse deadline string and return ISO format datetime - optimized with caching"""
+        """Parse deadline string and return ISO format datetime"""
         deadline_str = deadline_str.strip().lower()
         now = datetime.now()
         
@@ -52,57 +127,42 @@ class TodoCommands(commands.Cog):
             
             # Parse hours
             if 'hour' in time_part:
-                hours = int(re.search(r'(\d+)\s*hour', time_part).group(1))
+                hours = int(_RE_HOUR.search(time_part).group(1))
                 return (now + timedelta(hours=hours)).isoformat()
             
             # Parse days
             elif 'day' in time_part:
-                days = int(re.search(r'(\d+)\s*day', time_part).group(1))
+                days = int(_RE_DAY.search(time_part).group(1))
                 return (now + timedelta(days=days)).isoformat()
             
             # Parse weeks
             elif 'week' in time_part:
-                weeks = int(re.search(r'(\d+)\s*week', time_part).group(1))
+                weeks = int(_RE_WEEK.search(time_part).group(1))
                 return (now + timedelta(weeks=weeks)).isoformat()
             
             # Parse minutes
             elif 'minute' in time_part:
-                minutes = int(re.search(r'(\d+)\s*minute', time_part).group(1))
+                minutes = int(_RE_MINUTE.search(time_part).group(1))
                 return (now + timedelta(minutes=minutes)).isoformat()
         
-        # Parse absolute time formats
+        # Parse absolute time formats - one match picks the format
+        match = _RE_ABSOLUTE.match(deadline_str)
         try:
-            # Try parsing as "YYYY-MM-DD HH:MM"
-            if re.match(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}', deadline_str):
-                return datetime.strptime(deadline_str, '%Y-%m-%d %H:%M').isoformat()
-            
-            # Try parsing as "MM/DD/YYYY HH:MM"
-            elif re.match(r'\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}', deadline_str):
-                return datetime.strptime(deadline_str, '%m/%d/%Y %H:%M').isoformat()
-            
-            # Try parsing as "DD/MM/YYYY HH:MM"
-            elif re.match(r'\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}', deadline_str):
-                return datetime.strptime(deadline_str, '%d/%m/%Y %H:%M').isoformat()
-            
-            # Try parsing as "HH:MM" (today)
-            elif re.match(r'\d{1,2}:\d{2}', deadline_str):
-                time_obj = datetime.strptime(deadline_str, '%H:%M').time()
-                deadline = now.replace(hour=time_obj.hour, minute=time_obj.minute, second=0, microsecond=0)
-                if deadline <= now:
-                    deadline += timedelta(days=1)  # If time has passed, set for tomorrow
-                return deadline.isoformat()
-            
-            # Try parsing as "YYYY-MM-DD"
-            elif re.match(r'\d{4}-\d{2}-\d{2}', deadline_str):
-                return datetime.strptime(deadline_str, '%Y-%m-%d').replace(hour=23, minute=59).isoformat()
-            
-            # Try parsing as "MM/DD/YYYY"
-            elif re.match(r'\d{1,2}/\d{1,2}/\d{4}', deadline_str):
-                return datetime.strptime(deadline_str, '%m/%d/%Y').replace(hour=23, minute=59).isoformat()
-            
-            # Try parsing as "DD/MM/YYYY"
-            elif re.match(r'\d{1,2}/\d{1,2}/\d{4}', deadline_str):
-                return datetime.strptime(deadline_str, '%d/%m/%Y').replace(hour=23, minute=59).isoformat()
+            if match:
+                kind = match.lastgroup
+                
+                # "HH:MM" means today, or tomorrow if that time has passed; the groups are already digits
+                if kind == 'hm':
+                    deadline = now.replace(hour=int(match.group('hour')), minute=int(match.group('minute')), second=0, microsecond=0)
+                    if deadline <= now:
+                        deadline += timedelta(days=1)
+                    return deadline.isoformat()
+                
+                parsed = _cached_strptime(_ABSOLUTE_FORMATS[kind], deadline_str)
+                # A bare date is due at the end of that day
+                if kind in ('ymd', 'mdy'):
+                    parsed = parsed.replace(hour=23, minute=59)
+                return parsed.isoformat()
             
         except ValueError:
             pass
@@ -113,24 +173,26 @@ class TodoCommands(commands.Cog):
     def _format_deadline(self, deadline_iso: str) -> str:
         """Format deadline for display"""
         try:
-            deadline = datetime.fromisoformat(deadline_iso)
+            deadline = _iso_to_dt(deadline_iso)
             return deadline.strftime('%Y-%m-%d %H:%M')
         except ValueError:
             return "Invalid deadline"
     
-    def _get_deadline_status(self, deadline_iso: str) -> tuple:
-        """Get deadline status and time remaining"""
+    def _get_deadline_status(self, deadline_iso: str, deadline_ts: Optional[float] = None, now_ts: Optional[float] = None) -> tuple:
+        """Get deadline status and time remaining - pass the stored deadline_ts to skip parsing"""
         try:
-            deadline = datetime.fromisoformat(deadline_iso)
-            now = datetime.now()
+            if deadline_ts is None:
+                deadline_ts = _iso_to_dt(deadline_iso).timestamp()
+            if now_ts is None:
+                now_ts = time.time()
+            seconds_left = deadline_ts - now_ts
             
-            if deadline <= now:
+            if seconds_left <= 0:
                 return "overdue", "Overdue"
             
-            time_diff = deadline - now
-            days = time_diff.days
-            hours = time_diff.seconds // 3600
-            minutes = (time_diff.seconds % 3600) // 60
+            days, seconds_left = divmod(int(seconds_left), 86400)
+            hours = seconds_left // 3600
+            minutes = (seconds_left % 3600) // 60
             
             if days > 0:
                 return "upcoming", f"{days}d {hours}h remaining"
@@ -142,6 +204,18 @@ class TodoCommands(commands.Cog):
         except ValueError:
             return "invalid", "Invalid deadline"
     
+    def _deadline_view(self, deadline_iso: str, deadline_ts: Optional[float] = None, now_ts: Optional[float] = None) -> tuple:
+        """Get deadline status, time remaining and display string from a single parse"""
+        try:
+            deadline = _iso_to_dt(deadline_iso)
+        except ValueError:
+            return "invalid", "Invalid deadline", "Invalid deadline"
+        
+        if deadline_ts is None:
+            deadline_ts = deadline.timestamp()
+        status, time_remaining = self._get_deadline_status(deadline_iso, deadline_ts, now_ts)
+        return status, time_remaining, deadline.strftime('%Y-%m-%d %H:%M')
+    
     def _parse_reminder_time(self, time_str: str) -> datetime:
         """Parse various time formats for reminders - optimized"""
         time_str = time_str.lower().strip()
@@ -151,67 +225,60 @@ class TodoCommands(commands.Cog):
         if time_str.startswith('in '):
             time_str = time_str[3:]  # Remove "in "
             
-            # Use cached patterns for better performance
-            for pattern, time_func in self._time_patterns:
-                match = re.search(pattern, time_str)
-                if match:
-                    amount = int(match.group(1))
-                    return now + time_func(amount)
+            match = min(_UNIT_RE.finditer(time_str), key=lambda m: _UNIT_RANK[m.group(2)], default=None)
+            if match:
+                return now + timedelta(seconds=int(match.group(1)) * _UNIT_SECONDS[match.group(2)])
             
             raise ValueError("Invalid time format. Use: in X hours/minutes/days/weeks")
         
         # Handle specific time today/tomorrow
         if ':' in time_str:
             # Check if it's just time (HH:MM) or date and time
-            if len(time_str.split()) == 1:
-                # Just time - assume today or tomorrow
+            if ' ' not in time_str:
+                # Just time - assume today or tomorrow; plain int() parse, no strptime
+                hour, _, minute = time_str.partition(':')
                 try:
-                    time_parts = time_str.split(':')
-                    if len(time_parts) == 2:
-                        hour, minute = int(time_parts[0]), int(time_parts[1])
-                        reminder_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                        
-                        # If the time has already passed today, assume tomorrow
-                        if reminder_time <= now:
-                            reminder_time += timedelta(days=1)
-                        
-                        return reminder_time
-                    else:
-                        raise ValueError("Invalid time format. Use HH:MM")
+                    if ':' in minute:
+                        raise ValueError
+                    reminder_time = now.replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
                 except ValueError:
                     raise ValueError("Invalid time format. Use HH:MM")
+                
+                # If the time has already passed today, assume tomorrow
+                if reminder_time <= now:
+                    reminder_time += timedelta(days=1)
+                
+                return reminder_time
             else:
                 # Date and time format
-                try:
-                    # Use cached date formats for better performance
-                    for fmt in self._date_formats:
-                        try:
-                            return datetime.strptime(time_str, fmt)
-                        except ValueError:
-                            continue
-                    
-                    raise ValueError("Invalid date/time format")
-                except ValueError:
-                    raise ValueError("Invalid date/time format")
+                for fmt in self._reminder_formats(time_str):
+                    try:
+                        return _cached_strptime(fmt, time_str)
+                    except ValueError:
+                        continue
+                
+                raise ValueError("Invalid date/time format")
         
         # Handle specific dates
-        try:
-            # Use cached date-only formats for better performance
-            for fmt in self._date_only_formats:
-                try:
-                    date_obj = datetime.strptime(time_str, fmt)
-                    # Set to 9 AM on that date
-                    return date_obj.replace(hour=9, minute=0, second=0, microsecond=0)
-                except ValueError:
-                    continue
-            
-            raise ValueError("Invalid date format")
-        except ValueError:
-            raise ValueError("Invalid time format")
+        for fmt in self._reminder_formats(time_str):
+            try:
+                date_obj = _cached_strptime(fmt, time_str)
+                # Set to 9 AM on that date
+                return date_obj.replace(hour=9, minute=0, second=0, microsecond=0)
+            except ValueError:
+                continue
+        
+        raise ValueError("Invalid time format")
     
-    def _format_reminder_time(self, reminder_time: datetime) -> str:
-        """Format reminder time for display"""
-        now = datetime.now()
+    def _reminder_formats(self, time_str: str) -> tuple:
+        """Pick the strptime formats that match the shape of time_str"""
+        separator = '-' if '-' in time_str else '/'
+        return _REMINDER_FORMATS.get((separator, time_str.count(':')), ())
+    
+    def _format_reminder_time(self, reminder_time: datetime, now: Optional[datetime] = None) -> str:
+        """Format reminder time for display - pass now when formatting many"""
+        if now is None:
+            now = datetime.now()
         time_diff = reminder_time - now
         
         if time_diff.total_seconds() <= 0:
@@ -228,20 +295,30 @@ class TodoCommands(commands.Cog):
         else:
             return f"in {minutes}m ({reminder_time.strftime('%H:%M')})"
     
+    def _schedule_deadline_reminder(self, deadline_iso: str):
+        """Wake the bot's reminder timer when this deadline's reminder becomes due"""
+        try:
+            deadline = _iso_to_dt(deadline_iso)
+        except ValueError:
+            return
+        self.bot.schedule_reminder(deadline - timedelta(hours=CFG.deadline_reminder_hours))
+    
+    def _reply_embed(self, title: str, color: discord.Color, description: Optional[str] = None, footer: Optional[str] = None) -> discord.Embed:
+        """Create a timestamped reply embed - the shared base of every command's response"""
+        embed = discord.Embed(title=title, description=description, color=color, timestamp=discord.utils.utcnow())
+        if footer:
+            embed.set_footer(text=footer)
+        return embed
+    
     def _create_task_embed(self, title: str, description: str, color: discord.Color, task_id: int, task: str, deadline: str = None, user_id: str = None, author_name: str = None) -> discord.Embed:
         """Create a standardized task embed - optimized to reduce code duplication"""
-        embed = discord.Embed(
-            title=title,
-            description=description,
-            color=color,
-            timestamp=discord.utils.utcnow()
-        )
+        embed = self._reply_embed(title, color, description=description)
         
         if deadline:
-            status, time_remaining = self._get_deadline_status(deadline)
+            status, time_remaining, deadline_text = self._deadline_view(deadline)
             embed.add_field(
                 name="⏰ Deadline",
-                value=f"{self._format_deadline(deadline)}\n{time_remaining}",
+                value=f"{deadline_text}\n{time_remaining}",
                 inline=True
             )
         
@@ -262,13 +339,12 @@ class TodoCommands(commands.Cog):
         """Add a new task to the user's to-do list with optional deadline"""
         # Parse task and deadline
         deadline = None
-        task = task_input
+        task, sep, deadline_str = task_input.partition(' | ')
         
         # Check for deadline syntax: task | deadline
-        if ' | ' in task_input:
-            parts = task_input.split(' | ', 1)
-            task = parts[0].strip()
-            deadline_str = parts[1].strip()
+        if sep:
+            task = task.strip()
+            deadline_str = deadline_str.strip()
             
             try:
                 deadline = self._parse_deadline(deadline_str)
@@ -276,16 +352,16 @@ class TodoCommands(commands.Cog):
                 await ctx.send(f"❌ {str(e)}")
                 return
         
-        if len(task) > MAX_TASK_LENGTH:
-            await ctx.send(f"❌ Task is too long! Maximum {MAX_TASK_LENGTH} characters.")
+        if len(task) > CFG.max_task_length:
+            await ctx.send(f"❌ Task is too long! Maximum {CFG.max_task_length} characters.")
             return
         
         user_id = str(ctx.author.id)
-        success = self.db.add_task(user_id, task, deadline)
+        task_id = self.db.add_task(user_id, task, deadline)
         
-        if success:
-            tasks = self.db.get_tasks(user_id)
-            task_id = len(tasks)
+        if task_id is not None:
+            if deadline:
+                self._schedule_deadline_reminder(deadline)
             
             embed = self._create_task_embed(
                 title="✅ Task Added!",
@@ -307,11 +383,6 @@ class TodoCommands(commands.Cog):
     async def set_deadline(self, ctx, task_id: int, *, deadline_str: str):
         """Set or update deadline for a task"""
         user_id = str(ctx.author.id)
-        task = self.db.get_task(user_id, task_id)
-        
-        if not task:
-            await ctx.send("❌ Task not found! Use `!list` to see your tasks.")
-            return
         
         try:
             deadline = self._parse_deadline(deadline_str)
@@ -319,12 +390,14 @@ class TodoCommands(commands.Cog):
             await ctx.send(f"❌ {str(e)}")
             return
         
-        # Update the task deadline
-        task['deadline'] = deadline
-        task['reminder_sent'] = False  # Reset reminder flag
-        self.db._save_data()
+        # Look up and update the task in one call
+        task = self.db.update_task(user_id, task_id, deadline=deadline)
+        if not task:
+            await ctx.send("❌ Task not found! Use `!list` to see your tasks.")
+            return
+        
+        self._schedule_deadline_reminder(deadline)
         
-        status, time_remaining = self._get_deadline_status(deadline)
         embed = self._create_task_embed(
             title="⏰ Deadline Updated!",
             description=f"**Task #{task_id}:** {task['task']}",
@@ -340,13 +413,13 @@ class TodoCommands(commands.Cog):
     @commands.command(name='remindme', help='Set a custom reminder. Usage: !remindme <message> | <time>')
     async def remindme(self, ctx, *, reminder_input: str):
         """Set a custom reminder"""
-        if ' | ' not in reminder_input:
+        message, sep, time_str = reminder_input.partition(' | ')
+        if not sep:
             await ctx.send("❌ **Usage:** `!remindme <message> | <time>`\n\n**Examples:**\n• `!remindme Take medicine | in 2 hours`\n• `!remindme Call dentist | 14:30`\n• `!remindme Submit report | 2024-12-31 17:00`")
             return
         
-        parts = reminder_input.split(' | ', 1)
-        message = parts[0].strip()
-        time_str = parts[1].strip()
+        message = message.strip()
+        time_str = time_str.strip()
         
         if not message:
             await ctx.send("❌ Please provide a reminder message!")
@@ -373,12 +446,9 @@ class TodoCommands(commands.Cog):
             success = self.db.add_reminder(user_id, message, reminder_time.isoformat())
             
             if success:
-                embed = discord.Embed(
-                    title="⏰ Reminder Set!",
-                    description=f"**Message:** {message}",
-                    color=discord.Color.green(),
-                    timestamp=discord.utils.utcnow()
-                )
+                self.bot.schedule_reminder(reminder_time)
+                
+                embed = self._reply_embed("⏰ Reminder Set!", discord.Color.green(), description=f"**Message:** {message}")
                 
                 embed.add_field(
                     name="⏰ Reminder Time",
@@ -414,12 +484,7 @@ class TodoCommands(commands.Cog):
         reminders = self.db.get_reminders(user_id)
         
         if not reminders:
-            embed = discord.Embed(
-                title="⏰ Your Reminders",
-                description="You have no active reminders.",
-                color=discord.Color.blue(),
-                timestamp=discord.utils.utcnow()
-            )
+            embed = self._reply_embed("⏰ Your Reminders", discord.Color.blue(), description="You have no active reminders.")
             embed.add_field(
                 name="💡 Tip",
                 value="Use `!remindme <message> | <time>` to set a reminder!",
@@ -428,15 +493,13 @@ class TodoCommands(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        embed = discord.Embed(
-            title="⏰ Your Active Reminders",
-            color=discord.Color.blue(),
-            timestamp=discord.utils.utcnow()
-        )
+        embed = self._reply_embed("⏰ Your Active Reminders", discord.Color.blue())
         
+        now = datetime.now()
+        format_reminder_time = self._format_reminder_time
         for i, reminder in enumerate(reminders, 1):
-            reminder_time = datetime.fromisoformat(reminder['reminder_time'])
-            time_status = self._format_reminder_time(reminder_time)
+            reminder_time = _iso_to_dt(reminder['reminder_time'])
+            time_status = format_reminder_time(reminder_time, now)
             
             embed.add_field(
                 name=f"🔔 Reminder #{reminder['id']}",
@@ -454,12 +517,7 @@ class TodoCommands(commands.Cog):
         success = self.db.delete_reminder(user_id, reminder_id)
         
         if success:
-            embed = discord.Embed(
-                title="✅ Reminder Deleted",
-                description=f"Reminder #{reminder_id} has been deleted.",
-                color=discord.Color.green(),
-                timestamp=discord.utils.utcnow()
-            )
+            embed = self._reply_embed("✅ Reminder Deleted", discord.Color.green(), description=f"Reminder #{reminder_id} has been deleted.")
             await ctx.send(embed=embed)
         else:
             await ctx.send("❌ Reminder not found or you don't have permission to delete it!")
@@ -470,12 +528,7 @@ class TodoCommands(commands.Cog):
         user_id = str(ctx.author.id)
         count = self.db.clear_reminders(user_id)
         
-        embed = discord.Embed(
-            title="🗑️ Reminders Cleared",
-            description=f"Deleted {count} reminder(s).",
-            color=discord.Color.orange(),
-            timestamp=discord.utils.utcnow()
-        )
+        embed = self._reply_embed("🗑️ Reminders Cleared", discord.Color.orange(), description=f"Deleted {count} reminder(s).")
         await ctx.send(embed=embed)
 
     @commands.command(name='list', help='Show your to-do list')
@@ -485,12 +538,7 @@ class TodoCommands(commands.Cog):
         tasks = self.db.get_tasks(user_id)
         
         if not tasks:
-            embed = discord.Embed(
-                title="📋 Your To-Do List",
-                description="You have no tasks!",
-                color=discord.Color.blue(),
-                timestamp=discord.utils.utcnow()
-            )
+            embed = self._reply_embed("📋 Your To-Do List", discord.Color.blue(), description="You have no tasks!")
             embed.add_field(
                 name="💡 Tip",
                 value="Use `!add <task>` to add a new task!",
@@ -500,55 +548,51 @@ class TodoCommands(commands.Cog):
             return
         
         # Separate completed and pending tasks
-        pending_tasks = [task for task in tasks if not task['completed']]
-        completed_tasks = [task for task in tasks if task['completed']]
+        pending_tasks, completed_tasks = [], []
+        for task in tasks:
+            (completed_tasks if task['completed'] else pending_tasks).append(task)
         
-        embed = discord.Embed(
-            title="📋 Your To-Do List",
-            color=discord.Color.blue(),
-            timestamp=discord.utils.utcnow()
-        )
+        embed = self._reply_embed("📋 Your To-Do List", discord.Color.blue())
         
         # Add pending tasks
         if pending_tasks:
-            pending_text = ""
+            pending_parts = []
+            now_ts = time.time()
+            deadline_view = self._deadline_view  # Bound once for the loop
             for task in pending_tasks:
                 status = "⏳"
                 task_text = f"{status} **#{task['id']}** {task['task']}"
                 
                 if task.get('deadline'):
-                    deadline_status, time_remaining = self._get_deadline_status(task['deadline'])
-                    if deadline_status == "overdue":
-                        task_text += f" 🔴 (Overdue: {self._format_deadline(task['deadline'])})"
-                    elif deadline_status == "urgent":
-                        task_text += f" 🟡 (Due soon: {time_remaining})"
-                    else:
-                        task_text += f" ⏰ (Due: {time_remaining})"
+                    deadline_status, time_remaining, deadline_text = deadline_view(task['deadline'], task.get('deadline_ts'), now_ts)
+                    template = _DEADLINE_SUFFIX.get(deadline_status, _DEADLINE_SUFFIX['upcoming'])
+                    task_text += template.format(deadline=deadline_text, remaining=time_remaining)
                 
-                pending_text += task_text + "\n"
+                pending_parts.append(task_text)
             
             embed.add_field(
                 name=f"⏳ Pending Tasks ({len(pending_tasks)})",
-                value=pending_text or "No pending tasks",
+                value="\n".join(pending_parts),
                 inline=False
             )
         
         # Add completed tasks
         if completed_tasks:
-            completed_text = ""
+            completed_parts = []
+            format_deadline = self._format_deadline
             for task in completed_tasks:
                 status = "✅"
-                completed_at = datetime.fromisoformat(task['completed_at']).strftime("%Y-%m-%d %H:%M")
+                completed_at = _iso_to_dt(task['completed_at']).strftime("%Y-%m-%d %H:%M")
                 task_text = f"{status} **#{task['id']}** {task['task']} (Completed: {completed_at})"
                 
                 if task.get('deadline'):
-                    task_text += f" ⏰ (Deadline: {self._format_deadline(task['deadline'])})"
+                    task_text += f" ⏰ (Deadline: {format_deadline(task['deadline'])})"
                 
-                completed_text += task_text + "\n"
+                completed_parts.append(task_text)
             
             embed.add_field(
                 name=f"✅ Completed Tasks ({len(completed_tasks)})",
-                value=completed_text or "No completed tasks",
+                value="\n".join(completed_parts),
                 inline=False
             )
         
@@ -559,19 +603,13 @@ class TodoCommands(commands.Cog):
     async def complete_task(self, ctx, task_id: int):
         """Mark a task as completed"""
         user_id = str(ctx.author.id)
-        task = self.db.get_task(user_id, task_id)
+        task = self.db.complete_task(user_id, task_id)  # The task as it was before
         
         if not task:
             await ctx.send("❌ Task not found! Use `!list` to see your tasks.")
-            return
-        
-        if task['completed']:
+        elif task['completed']:
             await ctx.send("❌ This task is already completed!")
-            return
-        
-        success = self.db.complete_task(user_id, task_id)
-        
-        if success:
+        else:
             embed = self._create_task_embed(
                 title="✅ Task Completed!",
                 description=f"**Task #{task_id}:** {task['task']}",
@@ -583,26 +621,21 @@ class TodoCommands(commands.Cog):
             )
             embed.set_footer(text=f"Completed by {ctx.author.display_name}")
             await ctx.send(embed=embed)
-        else:
-            await ctx.send("❌ Failed to complete task. Please try again.")
     
     @commands.command(name='uncomplete', help='Mark a task as uncompleted. Usage: !uncomplete <id>')
     async def uncomplete_task(self, ctx, task_id: int):
         """Mark a completed task as uncompleted"""
         user_id = str(ctx.author.id)
-        task = self.db.get_task(user_id, task_id)
+        task = self.db.uncomplete_task(user_id, task_id)  # The task as it was before
         
         if not task:
             await ctx.send("❌ Task not found! Use `!list` to see your tasks.")
-            return
-        
-        if not task['completed']:
+        elif not task['completed']:
             await ctx.send("❌ This task is not completed!")
-            return
-        
-        success = self.db.uncomplete_task(user_id, task_id)
-        
-        if success:
+        else:
+            if task.get('deadline'):
+                self._schedule_deadline_reminder(task['deadline'])
+            
             embed = self._create_task_embed(
                 title="⏳ Task Uncompleted!",
                 description=f"**Task #{task_id}:** {task['task']}",
@@ -613,22 +646,16 @@ class TodoCommands(commands.Cog):
             )
             embed.set_footer(text=f"Uncompleted by {ctx.author.display_name}")
             await ctx.send(embed=embed)
-        else:
-            await ctx.send("❌ Failed to uncomplete task. Please try again.")
     
     @commands.command(name='remove', help='Remove a task. Usage: !remove <id>')
     async def remove_task(self, ctx, task_id: int):
         """Remove a task from the list"""
         user_id = str(ctx.author.id)
-        task = self.db.get_task(user_id, task_id)
+        task = self.db.remove_task(user_id, task_id)
         
         if not task:
             await ctx.send("❌ Task not found! Use `!list` to see your tasks.")
-            return
-        
-        success = self.db.remove_task(user_id, task_id)
-        
-        if success:
+        else:
             embed = self._create_task_embed(
                 title="🗑️ Task Removed!",
                 description=f"**Task #{task_id}:** {task['task']}",
@@ -639,8 +666,6 @@ class TodoCommands(commands.Cog):
             )
             embed.set_footer(text=f"Removed by {ctx.author.display_name}")
             await ctx.send(embed=embed)
-        else:
-            await ctx.send("❌ Failed to remove task. Please try again.")
     
     @commands.command(name='clear', help='Remove all completed tasks')
     async def clear_completed(self, ctx):
@@ -648,13 +673,7 @@ class TodoCommands(commands.Cog):
         user_id = str(ctx.author.id)
         count = self.db.clear_completed_tasks(user_id)
         
-        embed = discord.Embed(
-            title="🧹 Completed Tasks Cleared!",
-            description=f"Removed {count} completed task(s).",
-            color=discord.Color.orange(),
-            timestamp=discord.utils.utcnow()
-        )
-        embed.set_footer(text=f"Cleared by {ctx.author.display_name}")
+        embed = self._reply_embed("🧹 Completed Tasks Cleared!", discord.Color.orange(), description=f"Removed {count} completed task(s).", footer=f"Cleared by {ctx.author.display_name}")
         await ctx.send(embed=embed)
     
     @commands.command(name='clearall', help='Remove all tasks')
@@ -663,24 +682,13 @@ class TodoCommands(commands.Cog):
         user_id = str(ctx.author.id)
         count = self.db.clear_all_tasks(user_id)
         
-        embed = discord.Embed(
-            title="🗑️ All Tasks Cleared!",
-            description=f"Removed {count} task(s).",
-            color=discord.Color.red(),
-            timestamp=discord.utils.utcnow()
-        )
-        embed.set_footer(text=f"Cleared by {ctx.author.display_name}")
+        embed = self._reply_embed("🗑️ All Tasks Cleared!", discord.Color.red(), description=f"Removed {count} task(s).", footer=f"Cleared by {ctx.author.display_name}")
         await ctx.send(embed=embed)
     
     @commands.command(name='help', help='Show help information')
     async def help_command(self, ctx):
         """Show help information"""
-        embed = discord.Embed(
-            title="🤖 To-Do Bot Help",
-            description="Welcome to your personal to-do list manager!",
-            color=discord.Color.blue(),
-            timestamp=discord.utils.utcnow()
-        )
+        embed = self._reply_embed("🤖 To-Do Bot Help", discord.Color.blue(), description="Welcome to your personal to-do list manager!")
         
         embed.add_field(
             name="📋 To-Do Commands",
@@ -747,11 +755,7 @@ class TodoCommands(commands.Cog):
             embed_data = performance_monitor.get_performance_embed()
             
             if embed_data:
-                embed = discord.Embed(
-                    title=embed_data['title'],
-                    color=embed_data['color'],
-                    timestamp=discord.utils.utcnow()
-                )
+                embed = self._reply_embed(embed_data['title'], embed_data['color'])
                 
                 for field in embed_data['fields']:
                     embed.add_field(